@@ -0,0 +1,239 @@
+"""Admission control in front of the routes.
+
+Requests are grouped into route classes, each with its own concurrency limit
+and a bounded queue with a deadline, so a slow class (say writes waiting on row
+locks) can't take every pool connection from the others. When a resource a
+class needs is saturated, its requests are shed with a 503 and Retry-After at
+once, instead of waiting DB_POOL_TIMEOUT for a connection and timing out.
+"""
+
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Config
+from app.db.db_main import READ_METHODS, engine, pool_capacity, replica_engine
+from app.db.redis import InstrumentedRedis, redis_cache, token_blocklist
+from app.metrics import (
+    admission_admitted,
+    admission_queue_seconds,
+    admission_queued,
+    admission_shed,
+)
+from app.responses import FastJSONResponse
+
+# Resources each route class needs, reads fall back to the primary
+ROUTE_CLASS_RESOURCES = {
+    "auth": ("db", "redis"),
+    "book_reads": ("db_reads", "redis"),
+    "reviews": ("db_reads",),
+    "writes": ("db",),
+}
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Route class of a request, None for the ones never limited (health, docs)."""
+    if path.startswith("/auth"):
+        return "auth"
+    if path.startswith("/books") or path.startswith("/reviews"):
+        if method not in READ_METHODS:
+            return "writes"
+        if path.startswith("/reviews") or path.endswith("/reviews"):
+            return "reviews"
+        return "book_reads"
+    return None
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def pool_at_capacity(engine: AsyncEngine) -> bool:
+    return engine.pool.checkedout() >= pool_capacity(engine)
+
+
+def redis_at_capacity(client: InstrumentedRedis) -> bool:
+    return client.in_flight >= Config.REDIS_MAX_CONNECTIONS
+
+
+class Saturation:
+    """A resource counts as saturated once it has stayed at capacity for grace
+    seconds, so a pool that is briefly full under normal load sheds nothing.
+
+    Capacity is sampled on admission checks, which under load are frequent.
+    """
+
+    def __init__(self, at_capacity: Callable[[], bool], grace: float) -> None:
+        self.at_capacity = at_capacity
+        self.grace = grace
+        self._since: Optional[float] = None
+
+    def saturated(self) -> bool:
+        if not self.at_capacity():
+            self._since = None
+            return False
+        now = time.monotonic()
+        if self._since is None:
+            self._since = now
+        return now - self._since >= self.grace
+
+
+class Limiter:
+    """Concurrency limit with a bounded FIFO queue.
+
+    A released slot is handed to the oldest waiter directly, so a request
+    arriving meanwhile can't overtake the queue.
+    """
+
+    def __init__(
+        self, name: str, concurrency: int, queue_size: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise Overloaded("queue_full")
+
+        admission_queued.inc((self.name,))
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Since Python 3.12 wait_for times out even when release() handed
+            # the slot over in the same loop iteration, the slot is ours then
+            if waiter.done() and not waiter.cancelled():
+                return
+            raise Overloaded("queue_timeout")
+        except asyncio.CancelledError:
+            # The client went away, pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            admission_queue_seconds.observe((self.name,), time.perf_counter() - start)
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot moves on, active is unchanged
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        concurrency: Dict[str, int],
+        queue_size: int,
+        queue_timeout: float,
+        resources: Dict[str, Saturation],
+    ) -> None:
+        self.limiters = {
+            name: Limiter(name, limit, queue_size, queue_timeout)
+            for name, limit in concurrency.items()
+        }
+        self.resources = resources
+
+    def saturated_resource(self, name: str) -> Optional[str]:
+        for resource in ROUTE_CLASS_RESOURCES.get(name, ()):
+            if self.resources[resource].saturated():
+                return resource
+        return None
+
+    async def admit(self, name: str) -> Limiter:
+        resource = self.saturated_resource(name)
+        if resource is not None:
+            raise Overloaded(f"{resource}_saturated")
+        limiter = self.limiters[name]
+        await limiter.acquire()
+        return limiter
+
+    def stats(self) -> dict:
+        stats = {}
+        for name, limiter in self.limiters.items():
+            stats[f"{name}_active"] = limiter.active
+            stats[f"{name}_waiting"] = limiter.waiting
+        for name, resource in self.resources.items():
+            stats[f"{name}_saturated"] = resource.saturated()
+        return stats
+
+
+def build_resources(grace: float) -> Dict[str, Saturation]:
+    def db_reads_at_capacity() -> bool:
+        # Reads go wherever a connection is left
+        return pool_at_capacity(engine) and (
+            replica_engine is None or pool_at_capacity(replica_engine)
+        )
+
+    return {
+        "db": Saturation(lambda: pool_at_capacity(engine), grace),
+        "db_reads": Saturation(db_reads_at_capacity, grace),
+        "redis": Saturation(
+            lambda: redis_at_capacity(redis_cache)
+            or redis_at_capacity(token_blocklist),
+            grace,
+        ),
+    }
+
+
+admission = AdmissionController(
+    Config.ADMISSION_CONCURRENCY,
+    Config.ADMISSION_QUEUE_SIZE,
+    Config.ADMISSION_QUEUE_TIMEOUT,
+    build_resources(Config.ADMISSION_SATURATION_GRACE),
+)
+
+
+class AdmissionMiddleware:
+    """Admits each request through its route class, or answers 503."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = None
+        if scope["type"] == "http" and Config.ADMISSION_ENABLED:
+            name = route_class(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            limiter = await self.controller.admit(name)
+        except Overloaded as exc:
+            admission_shed.inc((name, exc.reason))
+            response = FastJSONResponse(
+                {"detail": "The service is overloaded, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(Config.ADMISSION_RETRY_AFTER)},
+            )
+            return await response(scope, receive, send)
+
+        admission_admitted.inc((name,))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Held until the response is sent, streamed bodies included
+            limiter.release()
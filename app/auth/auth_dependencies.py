@@ -1,14 +1,16 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.exceptions import HTTPException
 from fastapi import Request, status, Depends
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Any
+import redis.asyncio as redis
 
 from .auth_utils import decode_token
+from app.config import Config
 from app.db.redis import token_in_blocklist
-from app.db.db_main import get_session
+from app.db.db_main import get_session, read_router
 from .auth_service import AuthService
-from ..db.models import User
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,7 +46,17 @@ class TokenBearer(HTTPBearer):
                 },
             )
 
-        if await token_in_blocklist(token_data["jti"]):
+        try:
+            revoked = await token_in_blocklist(token_data["jti"])
+        except redis.RedisError as exc:
+            # Neither the mirror nor Redis can tell, refuse rather than guess
+            logger.warning(f"Token blocklist unavailable: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not verify the token, please retry",
+                headers={"Retry-After": str(Config.ADMISSION_RETRY_AFTER)},
+            )
+        if revoked:
             logger.warning(f"Blocked token used: jti={token_data['jti']}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -54,6 +66,8 @@ class TokenBearer(HTTPBearer):
                 },
             )
 
+        # Lets get_session attribute the request's writes to the user
+        request.state.token_details = token_data
         return token_data
 
     def token_valid(self, token_data: dict) -> bool:
@@ -91,28 +105,55 @@ class RefreshTokenBearer(TokenBearer):
             )
 
 
-async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
-    session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
+access_token_bearer = AccessTokenBearer()
+
+
+async def get_read_session(
+    token_details: dict = Depends(access_token_bearer),
+) -> AsyncSession:
+    """Read-only session for GET routes, on the replica when it is safe to use."""
+    session = await read_router.session(token_details["user"]["user_uid"])
+    async with session:
+        yield session
 
-    user = await user_service.get_user_by_email(user_email, session)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found for given token",
-        )
-    return user
+
+async def get_read_session_factory(
+    token_details: dict = Depends(access_token_bearer),
+) -> async_sessionmaker:
+    """Read-only session factory for responses that outlive the request's own
+    session, e.g. streamed bodies. Routed like get_read_session."""
+    return await read_router.session_factory(token_details["user"]["user_uid"])
 
 
 class RoleChecker:
+    """Authorizes from the verified ``role`` claim of the access token.
+
+    No database round-trip is made, so a role change applies once the user gets
+    a new token.
+    """
+
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
-        if current_user.role in self.allowed_roles:
-            return True
+    async def __call__(
+        self,
+        token_details: dict = Depends(access_token_bearer),
+        session: AsyncSession = Depends(get_session),
+    ) -> Any:
+        role = token_details["user"].get("role")
+        if role is None:
+            # Tokens minted before the role claim was added to every token
+            user = await user_service.get_user_by_email(
+                token_details["user"]["email"], session
+            )
+            role = user.role if user is not None else None
+
+        self.check_role(role)
+        return True
+
+    def check_role(self, role: str) -> None:
+        if role in self.allowed_roles:
+            return
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not allowed to perform this action",
@@ -1,65 +1,88 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta, datetime
+from typing import Optional
 
-from .auth_schemas import UserCreateModel, UserModel, UserLoginModel, UserBookModel
+from .auth_schemas import (
+    UserCreateModel,
+    UserModel,
+    UserLoginModel,
+    UserProfileModel,
+)
 from .auth_service import AuthService
+from ..books.schemas import UserBookPage
+from ..books.services import BookService
 from ..db.db_main import get_session
+from ..db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..db.query_budget import QueryBudget
 from ..db.redis import add_jti_to_blocklist
-from .auth_utils import create_access_token, decode_token, verify_password
+from .auth_utils import create_access_token, decode_token, verify_and_rehash
 from app.config import Config
+from app.responses import (
+    FastJSONResponse,
+    is_not_modified,
+    not_modified,
+    page_entity_tag,
+    validator_headers,
+)
+from app.reviews.review_schemas import ReviewFilters, ReviewPage
+from app.reviews.review_service import ReviewService
 from .auth_dependencies import (
-    AccessTokenBearer,
     RefreshTokenBearer,
-    get_current_user,
     RoleChecker,
+    access_token_bearer,
+    get_read_session,
 )
 
 auth_router = APIRouter(tags=["User Creation & Authentication"])
 auth_service = AuthService()
-access_token_bearer = AccessTokenBearer()
+book_service = BookService()
+review_service = ReviewService()
 refresh_token_bearer = RefreshTokenBearer()
 role_checker = RoleChecker(["admin", "user"])
 
 
 @auth_router.post(
-    "/sign_up/", response_model=UserModel, status_code=status.HTTP_201_CREATED
+    "/sign_up/",
+    response_model=UserModel,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(QueryBudget(1))],
 )
 async def create_user_account(
     user_data: UserCreateModel, session: AsyncSession = Depends(get_session)
 ):
-    email = user_data.email
-    username = user_data.username
-
-    user_exists = await auth_service.user_exists(email, username, session)
+    new_user = await auth_service.create_user(user_data, session)
 
-    if user_exists:
+    if new_user is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User with email or username already Exists",
         )
 
-    new_user = await auth_service.create_user(user_data, session)
-
     return new_user
 
 
-@auth_router.post("/login/")
+# Lookup, plus select and update when the password hash is upgraded
+@auth_router.post("/login/", dependencies=[Depends(QueryBudget(3))])
 async def login_user(
     login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
 ):
     email = login_data.email
     password = login_data.password
 
-    user = await auth_service.get_user_by_email(email, session)
+    user = await auth_service.get_login_credentials(email, session)
 
     if user is not None:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid, new_hash = await verify_and_rehash(password, user.password_hash)
 
         if password_valid:
+            if new_hash is not None:
+                # PASSWORD_HASH_ROUNDS changed since this hash was made
+                await auth_service.update_password_hash(user.uid, new_hash, session)
+
             access_token = create_access_token(
                 user_data={
                     "email": user.email,
@@ -68,8 +91,13 @@ async def login_user(
                 }
             )
 
+            # Carries the role too, access tokens minted from it keep the claim
             refresh_token = create_access_token(
-                user_data={"email": user.email, "user_uid": str(user.uid)},
+                user_data={
+                    "email": user.email,
+                    "user_uid": str(user.uid),
+                    "role": str(user.role),
+                },
                 refresh=True,
                 expiry=timedelta(minutes=Config.REFRESH_TOKEN_EXPIRY),
             )
@@ -91,7 +119,7 @@ async def login_user(
     )
 
 
-@auth_router.get("/refresh_token/")
+@auth_router.get("/refresh_token/", dependencies=[Depends(QueryBudget(0))])
 async def get_new_access_token(token_details: dict = Depends(refresh_token_bearer)):
     expiry_timestamp = token_details["exp"]
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
@@ -103,19 +131,75 @@ async def get_new_access_token(token_details: dict = Depends(refresh_token_beare
     # print(expiry_timestamp)
 
 
-@auth_router.get("/logout")
+@auth_router.get("/logout", dependencies=[Depends(QueryBudget(0))])
 async def revoke_token(token_details: dict = Depends(access_token_bearer)):
     jti = token_details["jti"]
 
-    await add_jti_to_blocklist(jti)
+    await add_jti_to_blocklist(jti, token_details["exp"])
 
     return JSONResponse(
         content={"message": "Successfully Logged Out"}, status_code=status.HTTP_200_OK
     )
 
 
-@auth_router.get("/me/", response_model=UserBookModel)
+# The profile and its counts, whatever the user's history
+@auth_router.get(
+    "/me/", response_model=UserProfileModel, dependencies=[Depends(QueryBudget(1))]
+)
 async def get_current_user(
-    user=Depends(get_current_user), _: bool = Depends(role_checker)
+    token_details: dict = Depends(access_token_bearer),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_read_session),
+):
+    user = await auth_service.get_user_profile(
+        token_details["user"]["user_uid"], session
+    )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found for given token",
+        )
+    return FastJSONResponse(user)
+
+
+def paged_response(request: Request, page: dict):
+    # The ETag is computed from the page that was read, a match saves the transfer
+    headers = validator_headers(page_entity_tag(page["items"], page["next_cursor"]))
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return FastJSONResponse(page, headers=headers)
+
+
+@auth_router.get(
+    "/me/books",
+    response_model=UserBookPage,
+    dependencies=[Depends(QueryBudget(1)), Depends(role_checker)],
+)
+async def get_current_user_books(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    token_details: dict = Depends(access_token_bearer),
+    session: AsyncSession = Depends(get_read_session),
+):
+    page = await book_service.get_user_books(
+        token_details["user"]["user_uid"], session, limit, cursor
+    )
+    return paged_response(request, page)
+
+
+@auth_router.get(
+    "/me/reviews",
+    response_model=ReviewPage,
+    dependencies=[Depends(QueryBudget(1)), Depends(role_checker)],
+)
+async def get_current_user_reviews(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    token_details: dict = Depends(access_token_bearer),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    return user
+    filters = ReviewFilters(user_uid=token_details["user"]["user_uid"])
+    page = await review_service.get_reviews(session, limit, cursor, filters)
+    return paged_response(request, page)
@@ -1,10 +1,6 @@
 from pydantic import BaseModel, Field
 import uuid
 from datetime import datetime
-from typing import List
-
-from app.books.schemas import Book
-from app.reviews.review_schemas import ReviewModel
 
 
 class UserCreateModel(BaseModel):
@@ -29,9 +25,17 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
-class UserBookModel(UserModel):
-    books: List[Book]
-    reviews: List[ReviewModel]
+class UserProfileModel(BaseModel):
+    uid: uuid.UUID
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    is_verified: bool
+    book_count: int
+    review_count: int
+    created_at: datetime
+    updated_at: datetime
 
 
 class UserLoginModel(BaseModel):
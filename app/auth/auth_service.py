@@ -1,39 +1,161 @@
 from ..db.models import User
 from .auth_schemas import UserCreateModel
 from .auth_utils import generate_password_hash
+from .user_cache import user_cache
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, update
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Tuple
+from datetime import datetime
+import uuid
+
+# GET /auth/me/, in the field order of UserProfileModel
+USER_PROFILE_COLUMNS = (
+    User.uid,
+    User.username,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.is_verified,
+    User.book_count,
+    User.review_count,
+    User.created_at,
+    User.updated_at,
+)
 
 
 class AuthService:
+    # Lookups by email return cached, immutable UserRecord snapshots
     async def get_user_by_email(self, email: str, session: AsyncSession):
+        record = user_cache.get_by_email(email)
+        if record is not None:
+            return record
+
         statement = select(User).where(User.email == email)
 
+        result = await session.exec(statement)
+        user = result.first()
+        return user_cache.put(user) if user is not None else None
+
+    async def get_login_credentials(self, email: str, session: AsyncSession):
+        # Never cached, the hash only leaves the database for this check
+        statement = select(User.uid, User.email, User.role, User.password_hash).where(
+            User.email == email
+        )
+
         result = await session.exec(statement)
         return result.first()
 
+    async def get_user_profile(self, user_uid: str, session: AsyncSession):
+        # One primary key lookup, the user's books and reviews are paged separately
+        statement = select(*USER_PROFILE_COLUMNS).where(User.uid == user_uid)
+
+        result = await session.exec(statement)
+        row = result.first()
+        return row._asdict() if row is not None else None
+
     async def get_user_by_username(self, username: str, session: AsyncSession):
         statement = select(User).where(User.username == username)
         result = await session.exec(statement)
         return result.first()
 
-    async def user_exists(self, email: str, username: str, session: AsyncSession):
-        user_email = await self.get_user_by_email(email, session)
-        username = await self.get_user_by_username(username, session)
-        if username is not None and user_email is not None:
-            return True
-        else:
-            return False
-
     async def create_user(self, user_data: UserCreateModel, session: AsyncSession):
-        user_data_dict = user_data.model_dump()
+        """Insert the user, or return None if the email or username is taken.
 
-        new_user = User(**user_data_dict)
+        The unique constraints decide in the same statement, so two concurrent
+        sign-ups cannot both pass a separate existence check.
+        """
+        user_data_dict = user_data.model_dump(exclude={"password"})
+        now = datetime.now()
 
-        new_user.password_hash = generate_password_hash(user_data_dict["password"])
-        new_user.role = "user"
+        statement = (
+            insert(User)
+            .values(
+                **user_data_dict,
+                uid=uuid.uuid4(),
+                role="user",
+                is_verified=False,
+                password_hash=await generate_password_hash(user_data.password),
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
 
-        session.add(new_user)
+        result = await session.exec(statement)
+        new_user = result.scalars().first()
         await session.commit()
 
+        if new_user is not None:
+            user_cache.invalidate(email=new_user.email, uid=new_user.uid)
+
         return new_user
+
+    async def adjust_user_counts(
+        self,
+        user_uid: uuid.UUID,
+        session: AsyncSession,
+        book_delta: int = 0,
+        review_delta: int = 0,
+    ) -> None:
+        # Relative update in the caller's transaction, like the rating aggregates
+        # of books. updated_at is kept, new books or reviews don't edit the profile.
+        statement = (
+            update(User)
+            .where(User.uid == user_uid)
+            .values(
+                book_count=User.book_count + book_delta,
+                review_count=User.review_count + review_delta,
+                updated_at=User.updated_at,
+            )
+        )
+        await session.exec(statement)
+
+    async def adjust_many_user_counts(
+        self, deltas: Dict[uuid.UUID, Tuple[int, int]], session: AsyncSession
+    ) -> None:
+        # One executemany of adjust_user_counts' update, (books, reviews) per user.
+        # Rows are locked in uid order so concurrent batches can't deadlock.
+        users = User.__table__
+        statement = (
+            update(users)
+            .where(users.c.uid == bindparam("user_uid"))
+            .values(
+                book_count=users.c.book_count + bindparam("book_delta"),
+                review_count=users.c.review_count + bindparam("review_delta"),
+                updated_at=users.c.updated_at,
+            )
+        )
+        await session.exec(
+            statement,
+            params=[
+                {"user_uid": uid, "book_delta": books, "review_delta": reviews}
+                for uid, (books, reviews) in sorted(deltas.items())
+            ],
+        )
+
+    async def update_password_hash(
+        self, user_uid: str, password_hash: str, session: AsyncSession
+    ):
+        return await self._update_user(
+            user_uid, {"password_hash": password_hash}, session
+        )
+
+    async def _update_user(self, user_uid: str, values: dict, session: AsyncSession):
+        statement = select(User).where(User.uid == user_uid)
+        result = await session.exec(statement)
+        user = result.first()
+
+        if user is None:
+            return None
+
+        for k, v in values.items():
+            setattr(user, k, v)
+        user.updated_at = datetime.now()
+
+        await session.commit()
+        user_cache.invalidate(email=user.email, uid=user.uid)
+
+        return user
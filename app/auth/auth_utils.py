@@ -1,20 +1,82 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from typing import Optional, Tuple
+import asyncio
 import jwt
 import uuid
 import logging
 
 from app.config import Config
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"])
+password_context = CryptContext(
+    schemes=["bcrypt"], deprecated=["auto"], bcrypt__rounds=Config.PASSWORD_HASH_ROUNDS
+)
 
+# bcrypt releases the GIL, so threads are enough to keep it off the event loop.
+# The semaphore bounds the queue in front of the pool.
+password_executor = ThreadPoolExecutor(
+    max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_password_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
 
-def generate_password_hash(password) -> str:
-    return password_context.hash(password)
 
+def password_slots() -> asyncio.Semaphore:
+    # Created in the running loop on first use, and again if the loop changes
+    global _password_slots
+    loop = asyncio.get_running_loop()
+    if _password_slots is None or _password_slots[0] is not loop:
+        _password_slots = (loop, asyncio.Semaphore(Config.PASSWORD_HASH_WORKERS))
+    return _password_slots[1]
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_context.verify(plain_password, hashed_password)
+
+async def _run_hashing(fn, *args):
+    slots = password_slots()
+    try:
+        # Unlike wait_for, a slot granted as the deadline fires is either kept
+        # (and released below) or handed back by acquire() itself
+        async with asyncio.timeout(Config.PASSWORD_HASH_QUEUE_TIMEOUT):
+            await slots.acquire()
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password checks, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, fn, *args)
+    finally:
+        slots.release()
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    # "$2b$12$<salt+checksum>"
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+async def generate_password_hash(password) -> str:
+    return await _run_hashing(password_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(password_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_rehash(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password, and return a new hash if the stored one uses another cost."""
+    valid = await verify_password(plain_password, hashed_password)
+    if valid and hash_rounds(hashed_password) != Config.PASSWORD_HASH_ROUNDS:
+        return True, await generate_password_hash(plain_password)
+    return valid, None
 
 
 # CREATING JWT TOKENS
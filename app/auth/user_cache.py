@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import uuid
+
+from app.cache import TTLCache
+from app.config import Config
+from ..db.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """Detached, immutable snapshot of a ``User`` row, safe to share across sessions.
+
+    The password hash is left out, only login reads it, straight from the row.
+    """
+
+    uid: uuid.UUID
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role: str
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserRecord":
+        return cls(
+            uid=user.uid,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            role=user.role,
+            is_verified=user.is_verified,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class UserCache:
+    """Per-worker user records keyed by email and by uid.
+
+    Other workers only see a change once their entry expires, so the TTL bounds
+    how long a role or verification change can take to apply everywhere.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get_by_email(self, email: str) -> Optional[UserRecord]:
+        return self._cache.get(("email", email))
+
+    def get_by_uid(self, uid) -> Optional[UserRecord]:
+        return self._cache.get(("uid", str(uid)))
+
+    def put(self, user: User) -> UserRecord:
+        record = UserRecord.from_user(user)
+        self._cache.set(("email", record.email), record)
+        self._cache.set(("uid", str(record.uid)), record)
+        return record
+
+    def invalidate(self, email: Optional[str] = None, uid=None) -> None:
+        # Either key is enough, the record tells us the other one
+        for key in (("email", email), ("uid", str(uid))):
+            record = self._cache.pop(key)
+            if record is not None:
+                self._cache.pop(("email", record.email))
+                self._cache.pop(("uid", str(record.uid)))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+user_cache = UserCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
@@ -0,0 +1,187 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+import json
+import logging
+import time
+import uuid
+
+import redis.asyncio as redis
+
+from app.cache import SingleFlight
+from app.config import Config
+from ..db.models import Book
+from ..db.redis import redis_cache
+
+logger = logging.getLogger(__name__)
+
+# Positional codec, the field names are not repeated in every payload.
+# Bump KEY_PREFIX whenever BOOK_FIELDS changes.
+KEY_PREFIX = "book:v2:"
+BOOK_FIELDS = (
+    "uid",
+    "title",
+    "publisher",
+    "published_date",
+    "page_count",
+    "language",
+    "user_uid",
+    "review_count",
+    "rating_sum",
+    "created_at",
+    "updated_at",
+)
+NOT_FOUND = b"-"
+# Held in the key while a miss is being loaded, never a valid payload
+LEASE_PREFIX = b"lease:"
+# Writes the loaded payload only if the key still holds this load's lease. An
+# invalidation in between deleted it, and the payload may predate that write.
+FILL_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return false
+"""
+
+
+def encode_book(book: Book) -> bytes:
+    values = []
+    for field in BOOK_FIELDS:
+        value = getattr(book, field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        values.append(value)
+    return json.dumps(values, separators=(",", ":")).encode()
+
+
+def decode_book(payload: bytes) -> Book:
+    # Detached instance, it is never bound to a session
+    return Book.model_validate(dict(zip(BOOK_FIELDS, json.loads(payload))))
+
+
+class BookCache:
+    """Cache-aside for single book reads.
+
+    Misses for the same uid are coalesced within the worker, unknown uids are
+    cached for a short while and Redis errors degrade to reading Postgres.
+
+    A miss takes a lease on the key before reading Postgres and only fills it
+    if the lease is still there, so a read racing an update can't put the old
+    row back after the update invalidated it.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        ttl: int,
+        negative_ttl: int,
+        enabled: bool = True,
+        retry_after: float = 5.0,
+        lease_ttl: float = 10.0,
+    ) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self.retry_after = retry_after
+        self.lease_ttl = lease_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._flight = SingleFlight()
+        self._disabled_until = 0.0
+
+    def _key(self, book_uid: uuid.UUID) -> str:
+        return f"{KEY_PREFIX}{book_uid}"
+
+    def _available(self) -> bool:
+        return self.enabled and time.monotonic() >= self._disabled_until
+
+    def _failed(self, exc: Exception) -> None:
+        # Back off for a few seconds instead of paying a timeout on every request
+        self.errors += 1
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning(f"Book cache unavailable: {exc}")
+
+    async def get_or_load(
+        self, book_uid: uuid.UUID, loader: Callable[[], Awaitable[Optional[Book]]]
+    ) -> Optional[Book]:
+        if not self._available():
+            return await loader()
+
+        key = self._key(book_uid)
+        try:
+            payload = await self.client.get(key)
+        except redis.RedisError as exc:
+            self._failed(exc)
+            return await loader()
+
+        if payload is not None and not payload.startswith(LEASE_PREFIX):
+            self.hits += 1
+        else:
+            self.misses += 1
+            payload = await self._flight.do(key, lambda: self._load(key, loader))
+
+        return None if payload == NOT_FOUND else decode_book(payload)
+
+    async def _load(self, key: str, loader) -> bytes:
+        lease = None
+        if self._available():
+            try:
+                # Another worker loading the key holds it, that one fills it
+                token = LEASE_PREFIX + uuid.uuid4().hex.encode()
+                if await self.client.set(
+                    key, token, nx=True, px=int(self.lease_ttl * 1000)
+                ):
+                    lease = token
+            except redis.RedisError as exc:
+                self._failed(exc)
+
+        book = await loader()
+        if book is None:
+            payload, ttl = NOT_FOUND, self.negative_ttl
+        else:
+            payload, ttl = encode_book(book), self.ttl
+
+        if lease is not None and self._available():
+            try:
+                await self.client.eval(FILL_SCRIPT, 1, key, lease, payload, ttl)
+            except redis.RedisError as exc:
+                self._failed(exc)
+        return payload
+
+    async def invalidate(self, book_uid: uuid.UUID) -> None:
+        # Attempted even while backing off, a stale entry outlives an outage
+        if not self.enabled:
+            return
+        try:
+            await self.client.delete(self._key(book_uid))
+        except redis.RedisError as exc:
+            self._failed(exc)
+
+    async def invalidate_many(self, book_uids: Iterable[uuid.UUID]) -> None:
+        # One DEL for all the keys, e.g. after a bulk delete
+        keys = [self._key(book_uid) for book_uid in book_uids]
+        if not self.enabled or not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except redis.RedisError as exc:
+            self._failed(exc)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "coalesced": self._flight.coalesced,
+        }
+
+
+book_cache = BookCache(
+    redis_cache,
+    ttl=Config.BOOK_CACHE_TTL,
+    negative_ttl=Config.BOOK_CACHE_NEGATIVE_TTL,
+    enabled=Config.BOOK_CACHE_ENABLED,
+)
@@ -0,0 +1,101 @@
+from typing import AsyncIterator, List, Tuple, Union
+import csv
+import json
+
+MAX_LINE_BYTES = 64 * 1024  # Bounds the buffer when a client never sends a newline
+
+INVALID_UTF8 = "Not valid UTF-8"
+
+
+class LineTooLong(Exception):
+    """The upload can't be read past this line."""
+
+    def __init__(self, line: int, what: str = "Line") -> None:
+        super().__init__(f"{what} {line} is longer than {MAX_LINE_BYTES} bytes")
+        self.line = line
+
+
+# (line number, parsed row) or (line number, parse error message)
+ParsedRow = Tuple[int, Union[dict, str]]
+
+
+def decode_line(line: bytes, line_no: int) -> Tuple[str, bool]:
+    encoding = "utf-8-sig" if line_no == 1 else "utf-8"
+    try:
+        return line.decode(encoding), True
+    except UnicodeDecodeError:
+        # Quotes and separators are ASCII, they still read the same
+        return line.decode(encoding, errors="replace"), False
+
+
+async def iter_lines(
+    stream: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[int, str, bool]]:
+    """(line number, text, whether the line was valid UTF-8) for each line."""
+    buffer = b""
+    line_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, *decode_line(line, line_no)
+        if len(buffer) > MAX_LINE_BYTES:
+            raise LineTooLong(line_no + 1)
+    if buffer:
+        yield line_no + 1, *decode_line(buffer, line_no + 1)
+
+
+async def iter_ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    async for line_no, line, valid in iter_lines(stream):
+        if not valid:
+            yield line_no, INVALID_UTF8
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, "Expected a JSON object"
+            continue
+        yield line_no, row
+
+
+async def iter_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    header = None
+    # Lines of the record being read, and its size and quote parity so far
+    record: List[str] = []
+    record_bytes, open_quote, first_line, valid_record = 0, False, 0, True
+    async for line_no, line, valid in iter_lines(stream):
+        first_line = first_line or line_no
+        record.append(line)
+        record_bytes += len(line.encode()) + 1
+        if record_bytes > MAX_LINE_BYTES:
+            # A stray quote would otherwise swallow the rest of the upload
+            raise LineTooLong(first_line, "Record starting on line")
+        valid_record = valid_record and valid
+        open_quote ^= line.count('"') % 2 == 1
+        if open_quote:
+            continue  # A quoted field continues on the next line
+
+        values = next(csv.reader(["\n".join(record)]), [])
+        start, first_line = first_line, 0
+        record, record_bytes = [], 0
+        if not valid_record:
+            valid_record = True
+            yield start, INVALID_UTF8
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip() for value in values]
+        elif len(values) != len(header):
+            yield start, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield start, dict(zip(header, values))
+
+    if record:
+        yield first_line, "Unterminated quoted field"
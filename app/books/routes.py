@@ -1,51 +1,139 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Request, Response
 from fastapi.exceptions import HTTPException
-from typing import List
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import List, Literal, Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 
-from .schemas import Book, BookUpdateModel, BookCreateModel, BookDetails
+from .schemas import (
+    Book,
+    BookUpdateModel,
+    BookCreateModel,
+    BookPage,
+    UserBookPage,
+    BookImportReport,
+    BookSearchPage,
+    BookBulkDeleteModel,
+    BookBulkDeleteReport,
+    BULK_DELETE_MAX_BOOKS,
+)
+from .bulk_import import iter_csv_rows, iter_ndjson_rows
 from ..db.db_main import get_session
+from ..db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..db.query_budget import QueryBudget
+from ..responses import (
+    FastJSONResponse,
+    entity_tag,
+    is_not_modified,
+    not_modified,
+    page_entity_tag,
+    validator_headers,
+)
 
-from .services import BookService
-from ..auth.auth_dependencies import AccessTokenBearer, RoleChecker
+from .services import BULK_DELETE_CHUNK_SIZE, BookService, parse_uid
+from ..reviews.review_schemas import ReviewFilters, ReviewPage
+from ..reviews.review_service import ReviewService
+from ..auth.auth_dependencies import (
+    RoleChecker,
+    access_token_bearer,
+    get_read_session,
+    get_read_session_factory,
+)
 
 book_router = APIRouter(tags=["Books"])
 book_service = BookService()
-access_token_bearer = AccessTokenBearer()
+review_service = ReviewService()
 role_checker = RoleChecker(["admin", "user"])
+admin_checker = RoleChecker(["admin"])
+
+# Lock, delete the reviews, delete the books, adjust the users' counts
+BULK_DELETE_CHUNKS = -(-BULK_DELETE_MAX_BOOKS // BULK_DELETE_CHUNK_SIZE)
 
 
 @book_router.get(
-    "/", response_model=List[BookDetails], dependencies=[Depends(role_checker)]
-)  # Have to define this using a List annotator to not throw error
+    "/",
+    response_model=BookPage,
+    dependencies=[Depends(QueryBudget(4)), Depends(role_checker)],
+)
 async def get_all_books(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,  # Planner estimate, not an exact COUNT(*)
+    session: AsyncSession = Depends(get_read_session),
     token_details=Depends(access_token_bearer),  # Turns this into a protected endpoint
 ):
-    books = await book_service.get_all_books(session)
     logging.info(f"{token_details} checked all books")
-    return books
+    estimated_total = (
+        await book_service.estimate_book_count(session) if include_total else None
+    )
+
+    # Pages carry no Last-Modified, a deleted row doesn't move max(updated_at)
+    if "if-none-match" in request.headers:
+        validators = await book_service.get_book_page_validators(session, limit, cursor)
+        headers = validator_headers(
+            page_entity_tag(
+                validators["items"], validators["next_cursor"], estimated_total
+            )
+        )
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+
+    page = await book_service.get_all_books(session, limit, cursor)
+    page["estimated_total"] = estimated_total
+    headers = validator_headers(
+        page_entity_tag(page["items"], page["next_cursor"], estimated_total)
+    )
+    return FastJSONResponse(page, headers=headers)
 
 
 @book_router.get(
-    "/user/{user_uid}", response_model=List[Book], dependencies=[Depends(role_checker)]
-)  # Have to define this using a List annotator to not throw error
+    "/user/{user_uid}",
+    response_model=UserBookPage,
+    dependencies=[Depends(QueryBudget(3)), Depends(role_checker)],
+)
 async def get_user_book_submissions(
+    request: Request,
     user_uid: str,
-    session: AsyncSession = Depends(get_session),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
     token_details=Depends(access_token_bearer),  # Turns this into a protected endpoint
 ):
-    books = await book_service.get_user_books(user_uid, session)
     logging.info(f"{token_details} checked all books")
-    return books
+    estimated_total = (
+        await book_service.estimate_book_count(session, user_uid)
+        if include_total
+        else None
+    )
+
+    if "if-none-match" in request.headers:
+        validators = await book_service.get_book_page_validators(
+            session, limit, cursor, user_uid
+        )
+        headers = validator_headers(
+            page_entity_tag(
+                validators["items"], validators["next_cursor"], estimated_total
+            )
+        )
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+
+    page = await book_service.get_user_books(user_uid, session, limit, cursor)
+    page["estimated_total"] = estimated_total
+    headers = validator_headers(
+        page_entity_tag(page["items"], page["next_cursor"], estimated_total)
+    )
+    return FastJSONResponse(page, headers=headers)
 
 
 @book_router.post(
     "/",
     status_code=status.HTTP_201_CREATED,
     response_model=Book,
-    dependencies=[Depends(role_checker)],
+    dependencies=[Depends(QueryBudget(2)), Depends(role_checker)],
 )
 async def create_a_book(
     book_data: BookCreateModel,
@@ -59,19 +147,136 @@ async def create_a_book(
     return new_book
 
 
+@book_router.get(
+    "/search",
+    response_model=BookSearchPage,
+    dependencies=[Depends(QueryBudget(3)), Depends(role_checker)],
+)
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+    publisher: Optional[str] = None,
+    facets: bool = False,  # Counts by language and publisher over all matches
+    session: AsyncSession = Depends(get_read_session),
+    token_details=Depends(access_token_bearer),
+):
+    page = await book_service.search_books(
+        q, session, limit, cursor, language, publisher, facets
+    )
+    logging.info(f"{token_details} searched books for {q!r}")
+    return page
+
+
+@book_router.get(
+    "/top-rated",
+    response_model=List[Book],
+    dependencies=[Depends(QueryBudget(1)), Depends(role_checker)],
+)
+async def get_top_rated_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    min_reviews: int = Query(1, ge=1),
+    session: AsyncSession = Depends(get_read_session),
+    token_details=Depends(access_token_bearer),
+):
+    books = await book_service.get_top_rated_books(session, limit, min_reviews)
+    logging.info(f"{token_details} checked the top rated books")
+    return books
+
+
+# Only counts what runs before the body streams, i.e. nothing
+@book_router.get(
+    "/export", dependencies=[Depends(QueryBudget(0)), Depends(role_checker)]
+)
+async def export_books(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    token_details=Depends(access_token_bearer),
+):
+    # The body is produced after this returns, so the export opens its own session
+    logging.info(f"{token_details} exported the catalog as {format}")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        book_service.export_books(session_factory, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
+
+
+@book_router.post(
+    "/bulk",
+    response_model=BookImportReport,
+    # COPY and the owner's book count go through the driver connection, outside
+    # the statement hooks
+    dependencies=[Depends(QueryBudget(0)), Depends(role_checker)],
+)
+async def import_books(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    token_details=Depends(access_token_bearer),
+):
+    # Body is streamed: NDJSON (one BookCreateModel per line) or CSV with a header
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = iter_ndjson_rows(request.stream())
+    elif content_type == "text/csv":
+        rows = iter_csv_rows(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/x-ndjson or text/csv",
+        )
+
+    user_id = token_details.get("user")["user_uid"]
+    report = await book_service.import_books(rows, user_id, session)
+    logging.info(f"{token_details} imported {report['inserted']} books")
+    return report
+
+
+@book_router.post(
+    "/bulk-delete",
+    response_model=BookBulkDeleteReport,
+    dependencies=[
+        Depends(QueryBudget(4 * BULK_DELETE_CHUNKS, max_repeats=BULK_DELETE_CHUNKS)),
+        Depends(admin_checker),
+    ],
+)
+async def bulk_delete_books(
+    delete_data: BookBulkDeleteModel,
+    session: AsyncSession = Depends(get_session),
+    token_details=Depends(access_token_bearer),
+):
+    report = await book_service.bulk_delete_books(
+        session, delete_data.uids, delete_data.filters
+    )
+    logging.info(f"{token_details} bulk deleted {report['deleted']} books")
+    return report
+
+
 @book_router.get(
     "/{book_uuid}",
-    dependencies=[Depends(role_checker)],
+    dependencies=[Depends(QueryBudget(1)), Depends(role_checker)],
 )
 async def get_book(
     book_uuid: str,
+    request: Request,
+    response: Response,
+    # Primary, cache misses refill Redis and a lagging replica would poison it
     session: AsyncSession = Depends(get_session),
     token_details=Depends(access_token_bearer),
 ):
     logging.info(f"{token_details} checked a book with uid {book_uuid}")
+    # Usually a book cache hit, a 304 then skips only the serialization
     book = await book_service.get_book(book_uuid, session)
 
     if book:
+        headers = validator_headers(
+            entity_tag(book.uid, book.updated_at.isoformat()), book.updated_at
+        )
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+        response.headers.update(headers)
         return book
     else:
         raise HTTPException(
@@ -79,9 +284,41 @@ async def get_book(
         )
 
 
+@book_router.get(
+    "/{book_uuid}/reviews",
+    response_model=ReviewPage,
+    # The book (usually cached) is only looked up when the first page is empty
+    dependencies=[Depends(QueryBudget(2)), Depends(role_checker)],
+)
+async def get_book_reviews(
+    book_uuid: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    primary_session: AsyncSession = Depends(get_session),
+    token_details=Depends(access_token_bearer),
+):
+    book_uid = parse_uid(book_uuid)
+    if book_uid is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book Not Found"
+        )
+
+    page = await review_service.get_reviews(
+        session, limit, cursor, ReviewFilters(book_uid=book_uid)
+    )
+    if not page["items"] and cursor is None:
+        if await book_service.get_book(book_uuid, primary_session) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book Not Found"
+            )
+    return FastJSONResponse(page)
+
+
 @book_router.patch(
     "/{book_uuid}",
-    dependencies=[Depends(role_checker)],
+    response_model=Book,
+    dependencies=[Depends(QueryBudget(2)), Depends(role_checker)],
 )
 async def update_book(
     book_uuid: str,
@@ -103,7 +340,7 @@ async def update_book(
 @book_router.delete(
     "/{book_uuid}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(role_checker)],
+    dependencies=[Depends(QueryBudget(4)), Depends(role_checker)],
 )
 async def delete_book(
     book_uuid: str,
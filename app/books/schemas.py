@@ -1,10 +1,18 @@
-from pydantic import BaseModel, field_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    computed_field,
+    field_validator,
+    model_validator,
+)
 import uuid
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
 from app.reviews.review_schemas import ReviewModel
 
+BULK_DELETE_MAX_BOOKS = 10_000  # Per request, by uid or matched by the filters
+
 
 class Book(BaseModel):
     uid: uuid.UUID
@@ -13,15 +21,34 @@ class Book(BaseModel):
     published_date: datetime
     page_count: int
     language: str
+    review_count: int = 0
+    rating_sum: int = Field(default=0, exclude=True)
 
     created_at: datetime
     updated_at: datetime
 
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return self.rating_sum / self.review_count if self.review_count else None
+
 
 class BookDetails(Book):
     reviews: List[ReviewModel]
 
 
+class BookPage(BaseModel):
+    items: List[BookDetails]
+    next_cursor: Optional[str] = None
+    estimated_total: Optional[int] = None
+
+
+class UserBookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+    estimated_total: Optional[int] = None
+
+
 class BookCreateModel(BaseModel):
     title: str
     publisher: str
@@ -47,3 +74,62 @@ class BookUpdateModel(BaseModel):
     publisher: str
     page_count: int
     language: str
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class BookSearchPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, List[FacetCount]]] = None
+
+
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+
+class BookImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportError]
+    errors_truncated: bool
+    # The upload was not read to the end, see the last error. Rows before it
+    # are imported, the ones after it were never read
+    aborted: bool = False
+
+
+class BookDeleteFilters(BaseModel):
+    user_uid: Optional[uuid.UUID] = None
+    publisher: Optional[str] = None
+    language: Optional[str] = None
+    published_before: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class BookBulkDeleteModel(BaseModel):
+    """Books to delete, either listed by uid or matched by filters (not both)."""
+
+    uids: Optional[List[uuid.UUID]] = Field(
+        default=None, min_length=1, max_length=BULK_DELETE_MAX_BOOKS
+    )
+    filters: Optional[BookDeleteFilters] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.uids is None) == (self.filters is None):
+            raise ValueError("Send either uids or filters")
+        if self.filters is not None and not self.filters.model_dump(exclude_none=True):
+            # An empty filter would match the whole catalog
+            raise ValueError("Set at least one filter")
+        return self
+
+
+class BookBulkDeleteReport(BaseModel):
+    deleted: int
+    reviews_deleted: int
+    # Filters matched more than BULK_DELETE_MAX_BOOKS books, send the request again
+    more: bool
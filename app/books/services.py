@@ -1,30 +1,306 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc
+from sqlmodel import select, delete, desc, text, update, func
+from sqlalchemy import bindparam, case, tuple_
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import csv
+import io
+import json
+import uuid
+import asyncpg
 
-from .schemas import BookCreateModel, BookUpdateModel
-from ..db.models import Book
+from .schemas import (
+    BULK_DELETE_MAX_BOOKS,
+    BookCreateModel,
+    BookDeleteFilters,
+    BookUpdateModel,
+)
+from ..auth.auth_service import AuthService
+from ..db.models import (
+    Book,
+    Review,
+    BOOK_SEARCH_CONFIG,
+    book_average_rating,
+    book_search_vector,
+)
+from ..db.pagination import (
+    DEFAULT_PAGE_SIZE,
+    keyset_before,
+    build_page,
+    decode_rank_cursor,
+    encode_rank_cursor,
+)
+from .book_cache import book_cache
+from .bulk_import import LineTooLong, ParsedRow
 from datetime import datetime
 
+SEARCH_FACET_SIZE = 10
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 100
+# COPY goes through the driver: server errors and values asyncpg can't encode
+COPY_ERRORS = (asyncpg.PostgresError, asyncpg.DataError, OverflowError)
+IMPORT_COLUMNS = (
+    "uid",
+    "title",
+    "publisher",
+    "published_date",
+    "page_count",
+    "language",
+    "user_uid",
+    "created_at",
+    "updated_at",
+)
+
+USER_BOOK_COUNT_UPDATE = 'UPDATE "user" SET book_count = book_count + $1 WHERE uid = $2'
+
+# One transaction per chunk, so row locks are held briefly
+BULK_DELETE_CHUNK_SIZE = 500
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = IMPORT_COLUMNS
+
+# List endpoints select their response fields as plain rows (in the field order of
+# the Book / ReviewModel schemas) and skip ORM objects and response validation
+BOOK_RESPONSE_COLUMNS = (
+    Book.uid,
+    Book.title,
+    Book.publisher,
+    Book.published_date,
+    Book.page_count,
+    Book.language,
+    Book.review_count,
+    Book.created_at,
+    Book.updated_at,
+    case((Book.review_count > 0, book_average_rating)).label("average_rating"),
+)
+REVIEW_RESPONSE_COLUMNS = (
+    Review.uid,
+    Review.rating,
+    Review.review_text,
+    Review.user_uid,
+    Review.book_uid,
+    Review.created_at,
+    Review.updated_at,
+)
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def parse_uid(value) -> Optional[uuid.UUID]:
+    # Malformed ids can't match a row, answer them without a round-trip
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+user_service = AuthService()
+
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    def _book_page_statement(
+        self,
+        columns: tuple,
+        limit: int,
+        cursor: Optional[str],
+        user_uid: Optional[str] = None,
+    ):
+        statement = (
+            select(*columns)
+            .order_by(desc(Book.created_at), desc(Book.uid))
+            .limit(limit + 1)
+        )
+        if user_uid is not None:
+            statement = statement.where(Book.user_uid == user_uid)
+        if cursor is not None:
+            statement = statement.where(
+                keyset_before(Book.created_at, Book.uid, cursor)
+            )
+        return statement
+
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = self._book_page_statement(BOOK_RESPONSE_COLUMNS, limit, cursor)
 
         result = await session.exec(statement)
-        return result.all()
+        page = build_page(result.all(), limit)
+        books = [row._asdict() for row in page["items"]]
+
+        # BookDetails embeds the reviews, fetched for the whole page at once
+        if books:
+            reviews = defaultdict(list)
+            result = await session.exec(
+                select(*REVIEW_RESPONSE_COLUMNS).where(
+                    Review.book_uid.in_([book["uid"] for book in books])
+                )
+            )
+            for row in result:
+                reviews[row.book_uid].append(row._asdict())
+            for book in books:
+                book["reviews"] = reviews[book["uid"]]
+
+        page["items"] = books
+        return page
+
+    async def get_user_books(
+        self,
+        user_uid: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = self._book_page_statement(
+            BOOK_RESPONSE_COLUMNS, limit, cursor, user_uid
+        )
+
+        result = await session.exec(statement)
+        page = build_page(result.all(), limit)
+        page["items"] = [row._asdict() for row in page["items"]]
+        return page
 
-    async def get_user_books(self, user_uid: str, session: AsyncSession):
+    async def get_book_page_validators(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        user_uid: Optional[str] = None,
+    ):
+        # Same rows as the page itself, but only what its ETag is computed from.
+        # Review writes bump the book's updated_at, so embedded reviews are covered.
+        columns = (Book.uid, Book.updated_at, Book.created_at)
+        statement = self._book_page_statement(columns, limit, cursor, user_uid)
+
+        result = await session.exec(statement)
+        page = build_page(result.all(), limit)
+        page["items"] = [row._asdict() for row in page["items"]]
+        return page
+
+    async def search_books(
+        self,
+        query: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        publisher: Optional[str] = None,
+        with_facets: bool = False,
+    ):
+        # Matches come from the GIN index, only the matches are ranked
+        ts_query = func.websearch_to_tsquery(BOOK_SEARCH_CONFIG, query)
+        matches = [book_search_vector.op("@@")(ts_query)]
+        if language is not None:
+            matches.append(Book.language == language)
+        if publisher is not None:
+            matches.append(Book.publisher == publisher)
+
+        rank = func.ts_rank_cd(book_search_vector, ts_query).label("rank")
+        statement = (
+            select(Book, rank)
+            .where(*matches)
+            .order_by(desc(rank), desc(Book.uid))
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            last_rank, last_uid = decode_rank_cursor(cursor)
+            statement = statement.where(
+                tuple_(rank, Book.uid) < tuple_(last_rank, last_uid)
+            )
+
+        result = await session.exec(statement)
+        page = build_page(
+            result.all(), limit, lambda row: encode_rank_cursor(row.rank, row.Book.uid)
+        )
+        page["items"] = [row.Book for row in page["items"]]
+
+        if with_facets:
+            page["facets"] = {
+                "language": await self._facet_counts(Book.language, matches, session),
+                "publisher": await self._facet_counts(Book.publisher, matches, session),
+            }
+
+        return page
+
+    async def _facet_counts(self, column, matches: list, session: AsyncSession):
+        statement = (
+            select(column, func.count().label("count"))
+            .where(*matches)
+            .group_by(column)
+            .order_by(desc("count"), column)
+            .limit(SEARCH_FACET_SIZE)
+        )
+
+        result = await session.exec(statement)
+        return [{"value": value, "count": count} for value, count in result.all()]
+
+    async def get_top_rated_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        min_reviews: int = 1,
+    ):
+        # Walks ix_books_top_rated backwards, never touches the reviews table
         statement = (
             select(Book)
-            .where(Book.user_uid == user_uid)
-            .order_by(desc(Book.created_at))
+            .where(Book.review_count > 0, Book.review_count >= min_reviews)
+            .order_by(
+                desc(book_average_rating), desc(Book.review_count), desc(Book.uid)
+            )
+            .limit(limit)
         )
 
         result = await session.exec(statement)
         return result.all()
 
+    async def estimate_book_count(
+        self, session: AsyncSession, user_uid: Optional[str] = None
+    ) -> Optional[int]:
+        # Planner statistics instead of COUNT(*), which would scan the whole table
+        if user_uid is None:
+            result = await session.exec(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = 'books'::regclass"
+                )
+            )
+            estimate = result.scalar()
+        else:
+            result = await session.exec(
+                text("EXPLAIN (FORMAT JSON) SELECT 1 FROM books WHERE user_uid = :uid"),
+                params={"uid": user_uid},
+            )
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
     async def get_book(self, book_uuid: str, session: AsyncSession):
-        statement = select(Book).where(Book.uid == book_uuid)
+        # Read path, served from the book cache as a detached Book
+        book_uid = parse_uid(book_uuid)
+        if book_uid is None:
+            return None
+
+        return await book_cache.get_or_load(
+            book_uid, lambda: self._load_book(book_uid, session)
+        )
+
+    async def _load_book(self, book_uid: uuid.UUID, session: AsyncSession, *options):
+        statement = select(Book).options(*options).where(Book.uid == book_uid)
 
         result = await session.exec(statement)
         return result.first()
@@ -38,15 +314,206 @@ class BookService:
         new_book.user_uid = user_uid
 
         session.add(new_book)
+        await user_service.adjust_user_counts(user_uid, session, book_delta=1)
 
         await session.commit()  # Adding a book to the database session
 
         return new_book
 
+    async def import_books(
+        self, rows: AsyncIterator[ParsedRow], user_uid: str, session: AsyncSession
+    ) -> dict:
+        """Validate streamed rows and COPY them in, one transaction per chunk.
+
+        Only a chunk of records and the first IMPORT_MAX_REPORTED_ERRORS errors
+        are held in memory, whatever the size of the upload. A chunk the
+        database rejects is split in halves and retried, down to single rows,
+        so only the rows at fault are reported.
+        """
+        report = {
+            "inserted": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+            "aborted": False,
+        }
+        owner_uid = uuid.UUID(str(user_uid))
+        chunk: List[tuple] = []
+        chunk_lines: List[int] = []
+
+        def fail(line: int, error: str) -> None:
+            report["failed"] += 1
+            if len(report["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line, "error": error})
+            else:
+                report["errors_truncated"] = True
+
+        async def copy(records: List[tuple], lines: List[int]) -> None:
+            try:
+                await self._copy_books(records, owner_uid, session)
+                await session.commit()
+                report["inserted"] += len(records)
+            except COPY_ERRORS as exc:
+                await session.rollback()
+                if len(records) == 1:
+                    fail(lines[0], f"Rejected by the database: {exc}")
+                    return
+                middle = len(records) // 2
+                await copy(records[:middle], lines[:middle])
+                await copy(records[middle:], lines[middle:])
+
+        async def flush() -> None:
+            await copy(chunk, chunk_lines)
+            chunk.clear()
+            chunk_lines.clear()
+
+        try:
+            async for line, row in rows:
+                if isinstance(row, str):
+                    fail(line, row)
+                    continue
+                try:
+                    book = BookCreateModel.model_validate(row)
+                except ValidationError as exc:
+                    fail(
+                        line,
+                        "; ".join(
+                            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                            for error in exc.errors()
+                        ),
+                    )
+                    continue
+
+                now = datetime.now()
+                chunk.append(
+                    (
+                        uuid.uuid4(),
+                        book.title,
+                        book.publisher,
+                        book.published_date,
+                        book.page_count,
+                        book.language,
+                        owner_uid,
+                        now,
+                        now,
+                    )
+                )
+                chunk_lines.append(line)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    await flush()
+        except LineTooLong as exc:
+            # Earlier chunks are committed already, the rows read so far go in
+            # too so the report says exactly what was imported
+            report["aborted"] = True
+            report["failed"] += 1
+            report["errors"].append(
+                {"line": exc.line, "error": f"{exc}, the rest was not read"}
+            )
+
+        if chunk:
+            await flush()
+
+        return report
+
+    async def _copy_books(
+        self, records: List[tuple], owner_uid: uuid.UUID, session: AsyncSession
+    ) -> None:
+        # COPY on the session's own asyncpg connection, inside its transaction,
+        # and the owner's book count with it (once per chunk, so the same way)
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        await driver_connection.copy_records_to_table(
+            Book.__tablename__, records=records, columns=IMPORT_COLUMNS
+        )
+        await driver_connection.execute(USER_BOOK_COUNT_UPDATE, len(records), owner_uid)
+
+    async def export_books(
+        self, session_factory: async_sessionmaker, fmt: str = "ndjson"
+    ) -> AsyncIterator[bytes]:
+        """Stream every book as NDJSON or CSV, one batch of rows at a time.
+
+        Rows come from a server-side cursor on a session owned by the generator,
+        in physical order so Postgres never has to sort the catalog.
+        """
+        columns = [getattr(Book, name) for name in EXPORT_COLUMNS]
+        statement = select(*columns).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        if fmt == "csv":
+            yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+
+        async with session_factory() as session:
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                buffer = io.StringIO()
+                if fmt == "csv":
+                    writer = csv.writer(buffer)
+                    for row in rows:
+                        writer.writerow([_export_value(value) for value in row])
+                else:
+                    for row in rows:
+                        record = dict(zip(EXPORT_COLUMNS, map(_export_value, row)))
+                        buffer.write(json.dumps(record, separators=(",", ":")))
+                        buffer.write("\n")
+                yield buffer.getvalue().encode()
+
+    async def adjust_review_stats(
+        self,
+        book_uid: uuid.UUID,
+        count_delta: int,
+        rating_delta: int,
+        session: AsyncSession,
+    ) -> None:
+        # Relative update, concurrent reviews of the same book can't lose counts.
+        # Runs in the caller's transaction, which commits and then invalidates.
+        statement = (
+            update(Book)
+            .where(Book.uid == book_uid)
+            .values(
+                review_count=Book.review_count + count_delta,
+                rating_sum=Book.rating_sum + rating_delta,
+            )
+        )
+        await session.exec(statement)
+
+    async def adjust_many_review_stats(
+        self, deltas: Dict[uuid.UUID, Tuple[int, int]], session: AsyncSession
+    ) -> None:
+        # One executemany of adjust_review_stats' update, (count, rating) per book.
+        # Rows are locked in uid order, like book deletes and review imports lock
+        # them, so none of these can deadlock with another.
+        books = Book.__table__
+        statement = (
+            update(books)
+            .where(books.c.uid == bindparam("book_uid"))
+            .values(
+                review_count=books.c.review_count + bindparam("count_delta"),
+                rating_sum=books.c.rating_sum + bindparam("rating_delta"),
+            )
+        )
+        await session.exec(
+            statement,
+            params=[
+                {"book_uid": uid, "count_delta": count, "rating_delta": rating}
+                for uid, (count, rating) in sorted(deltas.items())
+            ],
+        )
+
+    async def missing_book_uids(
+        self, book_uids: Iterable[uuid.UUID], session: AsyncSession
+    ) -> List[uuid.UUID]:
+        book_uids = set(book_uids)
+        result = await session.exec(select(Book.uid).where(Book.uid.in_(book_uids)))
+        return sorted(book_uids - set(result.all()))
+
     async def update_book(
         self, book_uuid: str, update_data: BookUpdateModel, session: AsyncSession
     ):
-        book_to_update = await self.get_book(book_uuid, session)
+        book_uid = parse_uid(book_uuid)
+        if book_uid is None:
+            return None
+
+        book_to_update = await self._load_book(book_uid, session)
 
         if book_to_update is not None:
             update_data_dict = update_data.model_dump()
@@ -57,20 +524,125 @@ class BookService:
                 )  # Get object and update it based on the keys and values we provide it
 
             await session.commit()
+            await book_cache.invalidate(book_uid)
 
             return book_to_update
         else:
             return None
 
+    async def _delete_books(self, statement, session: AsyncSession) -> Tuple[list, int]:
+        """Delete the books whose uids ``statement`` selects, with their reviews.
+
+        The books are locked first (in uid order), so no review can be added to
+        them meanwhile and the authors' counts come out exact. Runs in the
+        caller's transaction, which commits and then invalidates the cache.
+        """
+        result = await session.exec(statement.order_by(Book.uid).with_for_update())
+        book_uids = result.all()
+        if not book_uids:
+            return [], 0
+
+        counts = defaultdict(lambda: [0, 0])  # user uid -> [books, reviews]
+        result = await session.exec(
+            delete(Review)
+            .where(Review.book_uid.in_(book_uids))
+            .returning(Review.user_uid)
+        )
+        reviews_deleted = 0
+        for (author_uid,) in result:
+            reviews_deleted += 1
+            if author_uid is not None:
+                counts[author_uid][1] -= 1
+
+        result = await session.exec(
+            delete(Book).where(Book.uid.in_(book_uids)).returning(Book.user_uid)
+        )
+        for (owner_uid,) in result:
+            if owner_uid is not None:
+                counts[owner_uid][0] -= 1
+
+        if counts:
+            await user_service.adjust_many_user_counts(counts, session)
+        return book_uids, reviews_deleted
+
     async def delete_book(self, book_uuid: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_uuid, session)
+        book_uid = parse_uid(book_uuid)
+        if book_uid is None:
+            return None
+
+        deleted, _ = await self._delete_books(
+            select(Book.uid).where(Book.uid == book_uid), session
+        )
+        if not deleted:
+            return None
+
+        await session.commit()
+        await book_cache.invalidate(book_uid)
+
+        return {}
 
-        if book_to_delete is not None:
-            await session.delete(book_to_delete)
+    async def bulk_delete_books(
+        self,
+        session: AsyncSession,
+        book_uids: Optional[List[uuid.UUID]] = None,
+        filters: Optional[BookDeleteFilters] = None,
+    ) -> dict:
+        """Delete books listed by uid or matched by filters, a chunk per transaction.
 
+        Filters delete up to BULK_DELETE_MAX_BOOKS books per call, walking the
+        matches in uid order. ``more`` tells the caller to call again.
+        """
+        report = {"deleted": 0, "reviews_deleted": 0, "more": False}
+        remaining = sorted(set(book_uids or ()))
+        last_uid: Optional[uuid.UUID] = None
+
+        while True:
+            if filters is None:
+                chunk, remaining = (
+                    remaining[:BULK_DELETE_CHUNK_SIZE],
+                    remaining[BULK_DELETE_CHUNK_SIZE:],
+                )
+                if not chunk:
+                    break
+                statement = select(Book.uid).where(Book.uid.in_(chunk))
+            else:
+                if report["deleted"] >= BULK_DELETE_MAX_BOOKS:
+                    report["more"] = True
+                    break
+                size = min(
+                    BULK_DELETE_CHUNK_SIZE, BULK_DELETE_MAX_BOOKS - report["deleted"]
+                )
+                statement = (
+                    select(Book.uid)
+                    .where(*self._delete_conditions(filters))
+                    .limit(size)
+                )
+                if last_uid is not None:
+                    statement = statement.where(Book.uid > last_uid)
+
+            deleted, reviews_deleted = await self._delete_books(statement, session)
             await session.commit()
+            await book_cache.invalidate_many(deleted)
+            report["deleted"] += len(deleted)
+            report["reviews_deleted"] += reviews_deleted
 
-            return {}
+            if filters is not None:
+                if len(deleted) < size:
+                    break
+                last_uid = deleted[-1]
 
-        else:
-            return None
+        return report
+
+    def _delete_conditions(self, filters: BookDeleteFilters) -> list:
+        conditions = []
+        if filters.user_uid is not None:
+            conditions.append(Book.user_uid == filters.user_uid)
+        if filters.publisher is not None:
+            conditions.append(Book.publisher == filters.publisher)
+        if filters.language is not None:
+            conditions.append(Book.language == filters.language)
+        if filters.published_before is not None:
+            conditions.append(Book.published_date < filters.published_before)
+        if filters.created_before is not None:
+            conditions.append(Book.created_at < filters.created_before)
+        return conditions
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Dict, Literal, Optional, Union
 
 
 class Settings(BaseSettings):
@@ -9,8 +10,64 @@ class Settings(BaseSettings):
     JWT_EXP_DELTA_SECONDS: int
     REFRESH_TOKEN_EXPIRY: int
     REDIS_HOST: str
-    REDIS_PORT: int = "localhost"
-    REDIS_DB: int = 6379
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_SOCKET_TIMEOUT: float = (
+        0.5  # Cache calls give up fast and fall back to Postgres
+    )
+    REDIS_MAX_CONNECTIONS: int = 50  # Per client, beyond it calls fail at once
+    # Token blocklist mirror (app/db/redis.py)
+    BLOCKLIST_PING_INTERVAL: float = 5.0  # Seconds an idle subscription waits to ping
+    BLOCKLIST_MAX_STALENESS: float = 15.0  # Mirror trusted this long after a reply
+
+    # Database engine / connection pool
+    DB_ECHO: Union[bool, Literal["debug"]] = False  # "debug" also logs result rows
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 5.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: float = 5.0
+    DB_COMMAND_TIMEOUT: float = 30.0
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Set to 0 behind pgbouncer transaction pooling
+    # Optional streaming replica for GET routes (app/db/replica.py)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # A user's reads stay on the primary
+    REPLICA_RETRY_AFTER: float = 10.0  # Seconds to skip a replica that failed
+    REPLICA_MAX_LAG_SECONDS: float = 30.0  # Further behind counts as down, 0 = off
+    # Worker start-up (app/lifecycle.py), /health/ready waits for the warm-up
+    WARMUP_DB_CONNECTIONS: int = 2  # Opened per engine, capped at DB_POOL_SIZE
+    WARMUP_REDIS_CONNECTIONS: int = 2  # Per client, best effort
+    WARMUP_PRIME_QUERIES: bool = True  # Compile and prepare the hot list queries
+    WARMUP_RETRY_AFTER: float = 2.0  # Seconds between attempts while Postgres is down
+    # Admission control per route class (app/admission.py)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CONCURRENCY: Dict[str, int] = {
+        "auth": 10,
+        "book_reads": 20,
+        "reviews": 10,
+        "writes": 10,
+    }
+    ADMISSION_QUEUE_SIZE: int = 50  # Per route class, beyond it requests are shed
+    ADMISSION_QUEUE_TIMEOUT: float = 1.0  # Seconds a request may wait for a slot
+    ADMISSION_SATURATION_GRACE: float = 0.25  # Seconds at capacity before shedding
+    ADMISSION_RETRY_AFTER: int = 1
+    # Per-route SQL budgets (app/db/query_budget.py), "warn" in development
+    QUERY_BUDGET_MODE: Literal["off", "warn", "raise"] = "off"
+
+    # In-process cache of user records (app/auth/user_cache.py)
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60.0
+
+    # Redis cache-aside for single book reads (app/books/book_cache.py)
+    BOOK_CACHE_ENABLED: bool = True
+    BOOK_CACHE_TTL: int = 300
+    BOOK_CACHE_NEGATIVE_TTL: int = 30  # Unknown uids, so scanners can't pin Postgres
+
+    # bcrypt runs on a bounded thread pool (app/auth/auth_utils.py)
+    PASSWORD_HASH_ROUNDS: int = 12  # Changing it rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 2.0  # Seconds to wait for a free worker
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent / ".env", extra="ignore"  # app/.env
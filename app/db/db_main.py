@@ -1,23 +1,129 @@
-from sqlmodel import create_engine, SQLModel
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from fastapi import Request
+from typing import Optional
+import time
 
 
-from app.config import Config
+from app.config import Config, Settings
+from app.metrics import instrument_engine
+from app.db.query_budget import track_queries
+from app.db.redis import redis_cache
+from app.db.replica import ReadRouter
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
 
-engine = AsyncEngine(create_engine(url=Config.DATABASE_URL, echo=True))
 
+class PoolStats:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
 
-async def init_db() -> None:
-    async with engine.begin() as conn:
 
-        await conn.run_sync(SQLModel.metadata.create_all)
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers waited for a connection."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
 
-async def get_session() -> AsyncSession:
-    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    def recreate(self):
+        # engine.dispose() swaps the pool, keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
 
-    async with Session() as session:
+    def _create_connection(self):
+        self.stats.connects += 1
+        return super()._create_connection()
+
+    def _do_get(self):
+        self.stats.checkouts += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.stats.wait_seconds_total += waited
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+
+
+def build_engine(settings: Settings, url: Optional[str] = None) -> AsyncEngine:
+    engine = create_async_engine(
+        url or settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "timeout": settings.DB_CONNECT_TIMEOUT,
+            "command_timeout": settings.DB_COMMAND_TIMEOUT,
+            # asyncpg's own cache and SQLAlchemy's adapter cache on top of it
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    instrument_engine(engine)
+    track_queries(engine)
+    return engine
+
+
+def pool_capacity(engine: AsyncEngine) -> int:
+    # Connections the pool may open, every engine is built with the same limits
+    return engine.pool.size() + max(Config.DB_MAX_OVERFLOW, 0)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        # Share of the connections the pool may open (pool_size + max_overflow)
+        "utilization": pool.checkedout() / pool_capacity(engine),
+        **vars(pool.stats),
+    }
+
+
+engine = build_engine(Config)
+replica_engine = (
+    build_engine(Config, Config.DATABASE_REPLICA_URL)
+    if Config.DATABASE_REPLICA_URL
+    else None
+)
+
+# Built once, sessions are cheap but the factory configuration is not
+async_session_maker = async_sessionmaker(
+    bind=engine, class_=AsyncSession, expire_on_commit=False
+)
+read_router = ReadRouter(
+    redis_cache,
+    engine,
+    replica_engine,
+    read_your_writes=Config.READ_YOUR_WRITES_SECONDS,
+    retry_after=Config.REPLICA_RETRY_AFTER,
+    max_lag=Config.REPLICA_MAX_LAG_SECONDS,
+)
+
+
+async def get_session(request: Request) -> AsyncSession:
+    async with async_session_maker() as session:
         yield session
+
+    # Runs before the response is sent, so the user's next read sees the write.
+    # token_details is set by the TokenBearer dependencies (app/auth).
+    token_details = getattr(request.state, "token_details", None)
+    if request.method not in READ_METHODS and token_details is not None:
+        await read_router.record_write(token_details["user"]["user_uid"])
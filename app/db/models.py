@@ -1,12 +1,26 @@
-from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlmodel import SQLModel, Field, Column, Relationship, Index, UniqueConstraint
+from sqlalchemy import Computed, Float, cast
 import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime
 import uuid
 from typing import List, Optional
 
+# Relationships never load implicitly, each service query declares the eager loads
+# its response needs (e.g. selectinload(Book.reviews)). Touching an unloaded
+# relationship raises instead of silently issuing extra SELECTs.
+#
+# updated_at is bumped by every ORM flush and Core UPDATE that doesn't set it
+# explicitly, the ETags of app/responses.py rely on it.
+
 
 class User(SQLModel, table=True):
     __tablename__ = "user"  # Specifying the table name in the database
+    __table_args__ = (
+        # Also the lookup indexes for login and sign-up, which relies on them to
+        # reject duplicates with INSERT ... ON CONFLICT DO NOTHING
+        UniqueConstraint("email", name="uq_user_email"),
+        UniqueConstraint("username", name="uq_user_username"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -20,13 +34,25 @@ class User(SQLModel, table=True):
     )
     is_verified: bool = Field(default=False)
     password_hash: str = Field(exclude=True)
+    # Maintained in the transactions that write the user's books and reviews, so
+    # GET /auth/me/ reads them instead of counting rows
+    book_count: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
@@ -35,6 +61,11 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination on GET /books/ and GET /books/user/{user_uid}
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -45,21 +76,72 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="user.uid")
+    # Maintained by ReviewService in the same transaction as the review writes
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional["User"] = Relationship(
-        back_populates="books", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="books", sa_relationship_kwargs={"lazy": "raise"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book",
+        sa_relationship_kwargs={"lazy": "raise", "passive_deletes": True},
     )
 
     def __repr__(self):
         return f"<Book {self.title}>"
 
 
+# Only defined for reviewed books, the top-rated index is partial on review_count > 0
+book_average_rating = cast(Book.rating_sum, Float).op("/", return_type=Float)(
+    Book.review_count
+)
+
+Index(
+    "ix_books_top_rated",
+    book_average_rating,
+    Book.review_count,
+    Book.uid,
+    postgresql_where=Book.review_count > 0,
+)
+
+# Full-text search document, generated by Postgres. It is only added to the table,
+# not mapped on Book, so it never shows up in responses or ORM INSERTs.
+BOOK_SEARCH_CONFIG = "english"
+book_search_vector = Column(
+    "search_vector",
+    pg.TSVECTOR,
+    Computed(
+        f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', coalesce(publisher, '')), 'B')",
+        persisted=True,
+    ),
+)
+Book.__table__.append_column(book_search_vector)
+
+Index("ix_books_search_vector", book_search_vector, postgresql_using="gin")
+
+
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Foreign key lookups (selectinload, per-user / per-book listings), with
+        # the sort key appended so they also serve newest-first ordering
+        Index("ix_reviews_book_uid_created_at_uid", "book_uid", "created_at", "uid"),
+        Index("ix_reviews_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_reviews_created_at_uid", "created_at", "uid"),
+        # GET /reviews/ filtered by rating alone, with or without a time window
+        Index("ix_reviews_rating_created_at_uid", "rating", "created_at", "uid"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -67,14 +149,20 @@ class Review(SQLModel, table=True):
     rating: int = Field(lt=5)
     review_text: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="user.uid")
-    book_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="books.uid")
+    # Reviews go with their book. BookService deletes them itself, to maintain
+    # the authors' counts, the cascade covers every other delete.
+    book_uid: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="books.uid", ondelete="CASCADE"
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional["User"] = Relationship(
-        back_populates="reviews", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
     )
     book: Optional["Book"] = Relationship(
-        back_populates="reviews", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
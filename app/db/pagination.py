@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+# Cursors are opaque to clients: a url-safe base64 of the sort key of the last row
+def _encode(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, *parsers: Callable) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("Unexpected cursor shape")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    # uuid.UUID raises AttributeError for anything but a string
+    except (ValueError, TypeError, AttributeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    return _encode([created_at.isoformat(), str(uid)])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    return _decode(cursor, datetime.fromisoformat, uuid.UUID)
+
+
+def encode_rank_cursor(rank: float, uid: uuid.UUID) -> str:
+    return _encode([rank, str(uid)])
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, uuid.UUID]:
+    return _decode(cursor, float, uuid.UUID)
+
+
+def keyset_before(created_at_column: Any, uid_column: Any, cursor: str):
+    """Row-value comparison so Postgres can range scan the (created_at, uid) index."""
+    created_at, uid = decode_cursor(cursor)
+    return tuple_(created_at_column, uid_column) < tuple_(created_at, uid)
+
+
+def build_page(
+    rows: Sequence[Any], limit: int, make_cursor: Optional[Callable] = None
+) -> dict:
+    # Callers fetch limit + 1 rows, the extra row only tells us another page exists
+    items = list(rows[:limit])
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        last = items[-1]
+        if make_cursor is not None:
+            next_cursor = make_cursor(last)
+        else:
+            next_cursor = encode_cursor(last.created_at, last.uid)
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,114 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_REPEATS = 2
+
+# Bind parameters, and the length of expanded IN lists, vary between calls
+_PARAMETERS = re.compile(r"\$\d+(::\w+(\[\])?)?(, \$\d+(::\w+(\[\])?)?)*")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryLog:
+    """SQL statements executed while the log is active.
+
+    Usable around a request (QueryBudget does that) or a block of test code::
+
+        with QueryLog() as log:
+            asyncio.run(book_service.get_all_books(session, 20, None))
+        assert log.count == 2
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def __enter__(self):
+        self._token = current_query_log.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        current_query_log.reset(self._token)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(statement) for statement in self.statements)
+
+
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar(
+    "current_query_log", default=None
+)
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAMETERS.sub("?", " ".join(statement.split()))
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = current_query_log.get()
+    if log is not None:
+        log.statements.append(statement)
+
+
+def track_queries(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _record_statement)
+
+
+class QueryBudget:
+    """Route dependency declaring how much SQL one request may issue.
+
+    ``max_statements`` is the worst case over the route's parameters and cache
+    misses. ``max_repeats`` bounds how often one statement shape may run, the
+    signature of an N+1. Depending on QUERY_BUDGET_MODE an overrun is ignored,
+    logged with the offending SQL, or raised (the test suite does that).
+    """
+
+    def __init__(self, max_statements: int, max_repeats: int = DEFAULT_MAX_REPEATS):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+
+    def violations(self, log: QueryLog) -> List[str]:
+        problems = []
+        if log.count > self.max_statements:
+            problems.append(f"{log.count} statements, budget {self.max_statements}")
+        for shape, count in log.shapes().items():
+            if count > self.max_repeats:
+                problems.append(f"{count} x {shape}")
+        return problems
+
+    async def __call__(self, request: Request):
+        if Config.QUERY_BUDGET_MODE == "off":
+            yield
+            return
+
+        # Yield dependencies exit after the endpoint and response validation, so
+        # the log holds everything but the body of streaming responses
+        with QueryLog() as log:
+            yield
+
+        problems = self.violations(log)
+        if not problems:
+            return
+
+        message = (
+            f"{request.method} {request.scope['route'].path} is over its query "
+            f"budget: {'; '.join(problems)}\n" + "\n".join(log.statements)
+        )
+        if Config.QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
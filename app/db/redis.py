@@ -1,20 +1,236 @@
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 from app.config import Config
+from app.metrics import record_redis_call
+from typing import Dict, Optional
+import asyncio
+import logging
+import time
 
-JTI_EXPIRY = 3600
+logger = logging.getLogger(__name__)
 
-token_blocklist = redis.Redis(
+JTI_EXPIRY = 3600  # Fallback when a token carries no exp claim
+
+
+class InstrumentedPipeline(Pipeline):
+    owner: "InstrumentedRedis"
+
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        self.owner.in_flight += 1
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            self.owner.in_flight -= 1
+            record_redis_call(time.perf_counter() - start)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Client that records each round trip, a pipeline counts as one.
+
+    ``in_flight`` counts the round trips under way, each holds a pool
+    connection (pub/sub connections are not counted).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        self.in_flight += 1
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            self.in_flight -= 1
+            record_redis_call(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        pipe = InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+        pipe.owner = self
+        return pipe
+
+
+token_blocklist = InstrumentedRedis(
     host=Config.REDIS_HOST,
     port=Config.REDIS_PORT,
     db=0,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
     decode_responses=True,  # Optional: return strings instead of bytes
 )
 
+# Binary client for cached payloads, kept on short timeouts so a slow Redis
+# degrades to a cache miss instead of a slow request
+redis_cache = InstrumentedRedis(
+    host=Config.REDIS_HOST,
+    port=Config.REDIS_PORT,
+    db=Config.REDIS_DB,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
+    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+)
+
+
+class TokenBlocklist:
+    """Revoked JTIs in Redis, mirrored in every worker.
+
+    Each revocation is stored as its own key (expiring with the token), indexed
+    in a sorted set scored by ``exp`` and published on a channel. Workers load
+    the sorted set once, then follow the channel, so while the subscription is
+    healthy a lookup is a set membership test with no network I/O. Whenever it
+    is not, lookups go to Redis.
+
+    An idle subscription is pinged every ``ping_interval`` seconds. The mirror
+    is only trusted while something arrived on it within ``max_staleness``
+    seconds, so a half-open connection (idle drop, failover) can't keep
+    accepting tokens revoked elsewhere.
+    """
+
+    INDEX_KEY = "blocklist:index"
+    CHANNEL = "blocklist:revoked"
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        retry_after: float = 1.0,
+        ping_interval: float = 5.0,
+        max_staleness: float = 15.0,
+    ) -> None:
+        self.client = client
+        self.retry_after = retry_after
+        self.ping_interval = ping_interval
+        self.max_staleness = max_staleness
+        self.synced = False
+        self.local_hits = 0
+        self.redis_lookups = 0
+        self.revocations = 0
+        self._revoked: Dict[str, float] = {}  # jti -> exp
+        self._last_seen = 0.0  # Monotonic time of the last message or pong
+        self._listener: Optional[asyncio.Task] = None
+
+    async def add(self, jti: str, exp: Optional[float] = None) -> None:
+        now = time.time()
+        exp = exp if exp is not None else now + JTI_EXPIRY
+        ttl = max(1, int(exp - now) + 1)  # The token is useless once it expires
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(name=jti, value="", ex=ttl)
+            pipe.zadd(self.INDEX_KEY, {jti: exp})
+            pipe.zremrangebyscore(self.INDEX_KEY, "-inf", now)
+            pipe.publish(self.CHANNEL, f"{jti} {exp}")
+            await pipe.execute()
+
+        self.revocations += 1
+        self._remember(jti, exp)
+
+    async def contains(self, jti: str) -> bool:
+        self.start()
+        if self._fresh():
+            self.local_hits += 1
+            return jti in self._revoked
+
+        self.redis_lookups += 1
+        value = await self.client.get(jti)
+        return value is not None
+
+    def start(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.synced = False
+
+    def _fresh(self) -> bool:
+        return self.synced and time.monotonic() - self._last_seen <= self.max_staleness
+
+    def _remember(self, jti: str, exp: float) -> None:
+        self._revoked[jti] = exp
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp < now]:
+            del self._revoked[jti]
+
+    def _handle(self, data: str) -> None:
+        try:
+            jti, exp = data.split(" ")
+            exp = float(exp)
+        except ValueError:
+            logger.warning(f"Ignoring a malformed blocklist message: {data!r}")
+            return
+        self._remember(jti, exp)
+        self._prune()
+
+    async def _follow(self) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                # Wait for the confirmation so no revocation slips in between
+                # the snapshot and the subscription
+                deadline = time.monotonic() + self.max_staleness
+                while (await pubsub.get_message(timeout=self.retry_after)) is None:
+                    if time.monotonic() > deadline:
+                        raise redis.TimeoutError("No subscription confirmation")
+
+                now = time.time()
+                snapshot = await self.client.zrangebyscore(
+                    self.INDEX_KEY, now, "+inf", withscores=True
+                )
+                self._revoked = {jti: exp for jti, exp in snapshot}
+                self._last_seen = time.monotonic()
+                self.synced = True
+
+                while True:
+                    message = await pubsub.get_message(timeout=self.ping_interval)
+                    if message is None:
+                        if time.monotonic() - self._last_seen > self.max_staleness:
+                            raise redis.TimeoutError("No reply on the subscription")
+                        await pubsub.ping()
+                        continue
+                    self._last_seen = time.monotonic()
+                    if message["type"] == "message":
+                        self._handle(message["data"])
+            except redis.RedisError as exc:
+                logger.warning(f"Token blocklist sync lost, using Redis lookups: {exc}")
+            except Exception:
+                # Anything else would end the task unnoticed, log it and resync
+                logger.exception("Token blocklist listener failed, using Redis lookups")
+            finally:
+                self.synced = False
+                await pubsub.aclose()
+
+            await asyncio.sleep(self.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "synced": int(self._fresh()),
+            "local_size": len(self._revoked),
+            "local_hits": self.local_hits,
+            "redis_lookups": self.redis_lookups,
+            "revocations": self.revocations,
+        }
+
+
+blocklist = TokenBlocklist(
+    token_blocklist,
+    ping_interval=Config.BLOCKLIST_PING_INTERVAL,
+    max_staleness=Config.BLOCKLIST_MAX_STALENESS,
+)
+
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+async def add_jti_to_blocklist(jti: str, exp: Optional[float] = None) -> None:
+    await blocklist.add(jti, exp)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    value = await token_blocklist.get(jti)
-    return value is not None
+    return await blocklist.contains(jti)
@@ -0,0 +1,175 @@
+from typing import Optional
+import logging
+import time
+
+import redis.asyncio as redis
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.query_budget import current_query_log
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ryw:"
+# Raised when no replica connection can be had, refused, timed out or pool empty
+REPLICA_ERRORS = (DBAPIError, OSError, PoolTimeoutError)
+# Seconds of replay lag, 0 once everything received is replayed (an idle primary
+# writes nothing new) and NULL on a server that isn't a standby
+REPLICA_LAG_QUERY = """
+SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+
+def read_only_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    # Every transaction of these sessions starts with BEGIN READ ONLY, the option
+    # is applied when a connection is checked out and reset on its return
+    return async_sessionmaker(
+        bind=engine.execution_options(postgresql_readonly=True),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+class ReadRouter:
+    """Chooses where the read-only sessions of GET routes run.
+
+    Reads go to the replica unless none is configured, it failed or lagged more
+    than ``max_lag`` seconds behind within the last ``retry_after`` seconds, or
+    the user wrote within the last ``read_your_writes`` seconds. Writes are
+    recorded in Redis so the window holds across workers, without Redis reads
+    conservatively use the primary. The lag is checked at most once per
+    ``retry_after`` seconds.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        primary: AsyncEngine,
+        replica: Optional[AsyncEngine] = None,
+        read_your_writes: float = 5.0,
+        retry_after: float = 10.0,
+        max_lag: float = 30.0,
+    ) -> None:
+        self.client = client
+        self.primary = read_only_sessionmaker(primary)
+        self.replica = read_only_sessionmaker(replica) if replica is not None else None
+        self.read_your_writes = read_your_writes
+        self.retry_after = retry_after
+        self.max_lag = max_lag
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self.replica_lag: Optional[float] = None
+        self._replica_down_until = 0.0
+        self._lag_checked_at: Optional[float] = None
+
+    def _key(self, user_uid: str) -> str:
+        return f"{KEY_PREFIX}{user_uid}"
+
+    def _replica_available(self) -> bool:
+        return self.replica is not None and time.monotonic() >= self._replica_down_until
+
+    async def record_write(self, user_uid: str) -> None:
+        if self.replica is None or self.read_your_writes <= 0:
+            return
+        try:
+            await self.client.set(
+                self._key(user_uid), 1, px=int(self.read_your_writes * 1000)
+            )
+        except redis.RedisError as exc:
+            logger.warning(f"Could not record a write for read-your-writes: {exc}")
+
+    async def _wrote_recently(self, user_uid: str) -> bool:
+        if self.read_your_writes <= 0:
+            return False
+        try:
+            return bool(await self.client.exists(self._key(user_uid)))
+        except redis.RedisError as exc:
+            logger.warning(f"Read-your-writes check failed, using the primary: {exc}")
+            return True
+
+    async def _lagging(self, session: AsyncSession) -> bool:
+        now = time.monotonic()
+        if self.max_lag <= 0 or (
+            self._lag_checked_at is not None
+            and now < self._lag_checked_at + self.retry_after
+        ):
+            return False
+        self._lag_checked_at = now
+        # The router's own statement, not counted in the route's query budget
+        token = current_query_log.set(None)
+        try:
+            result = await session.exec(text(REPLICA_LAG_QUERY))
+            lag = result.scalar_one()
+        finally:
+            current_query_log.reset(token)
+        self.replica_lag = float(lag) if lag is not None else None
+        return self.replica_lag is not None and self.replica_lag > self.max_lag
+
+    async def _replica_session(self, user_uid: Optional[str]) -> Optional[AsyncSession]:
+        """A replica session connected up front, None when reads use the primary."""
+        if not self._replica_available() or (
+            user_uid is not None and await self._wrote_recently(user_uid)
+        ):
+            return None
+
+        session = self.replica()
+        try:
+            # Connect up front, so a failing replica falls back in this request
+            await session.connection()
+            lagging = await self._lagging(session)
+        except REPLICA_ERRORS as exc:
+            await session.close()
+            self._fall_back(f"Replica unavailable, reading from the primary: {exc}")
+            return None
+        if lagging:
+            await session.close()
+            self._fall_back(
+                f"Replica is {self.replica_lag:.1f}s behind, reading from the primary"
+            )
+            return None
+        return session
+
+    def _fall_back(self, message: str) -> None:
+        self.fallbacks += 1
+        self._replica_down_until = time.monotonic() + self.retry_after
+        logger.warning(message)
+
+    async def session(self, user_uid: Optional[str] = None) -> AsyncSession:
+        """Open a read-only session, which the caller closes."""
+        session = await self._replica_session(user_uid)
+        if session is not None:
+            self.replica_reads += 1
+            return session
+
+        self.primary_reads += 1
+        return self.primary()
+
+    async def session_factory(
+        self, user_uid: Optional[str] = None
+    ) -> async_sessionmaker:
+        """Factory for sessions opened after the request, e.g. by streamed
+        exports, chosen the way session() chooses.
+        """
+        session = await self._replica_session(user_uid)
+        if session is not None:
+            # The probe's connection goes back to the pool for the export to reuse
+            await session.close()
+            self.replica_reads += 1
+            return self.replica
+
+        self.primary_reads += 1
+        return self.primary
+
+    def stats(self) -> dict:
+        return {
+            "replica_configured": self.replica is not None,
+            "replica_available": self._replica_available(),
+            "replica_lag_seconds": self.replica_lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,130 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Optional
+import asyncio
+import logging
+import time
+
+import redis.asyncio as redis
+
+from app.books.services import BookService
+from app.config import Config
+from app.db.db_main import engine, read_router, replica_engine
+from app.db.redis import redis_cache, token_blocklist
+from app.reviews.review_service import ReviewService
+
+logger = logging.getLogger(__name__)
+
+book_service = BookService()
+review_service = ReviewService()
+
+
+async def open_connections(engine: AsyncEngine, count: int) -> None:
+    # Concurrent checkouts, each one finds the pool empty and opens a connection
+    async def connect():
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    await asyncio.gather(*(connect() for _ in range(count)))
+
+
+async def open_redis_connections(client: redis.Redis, count: int) -> None:
+    await asyncio.gather(*(client.ping() for _ in range(count)))
+
+
+async def prime_queries() -> None:
+    # Runs the hot list queries once, so SQLAlchemy's compiled cache holds them
+    # and the connection has them prepared before the first request
+    session = await read_router.session()
+    async with session:
+        await book_service.get_all_books(session)
+        await review_service.get_reviews(session)
+
+
+async def warm_up() -> None:
+    connections = min(Config.WARMUP_DB_CONNECTIONS, Config.DB_POOL_SIZE)
+    await open_connections(engine, connections)
+
+    # Reads fall back to the primary and the caches to Postgres, so neither a
+    # replica nor Redis being down holds up readiness
+    if replica_engine is not None:
+        try:
+            await open_connections(replica_engine, connections)
+        except (SQLAlchemyError, OSError) as exc:
+            logger.warning(f"Replica warm-up failed: {exc}")
+    try:
+        for client in (token_blocklist, redis_cache):
+            await open_redis_connections(client, Config.WARMUP_REDIS_CONNECTIONS)
+    except redis.RedisError as exc:
+        logger.warning(f"Redis warm-up failed: {exc}")
+
+    if Config.WARMUP_PRIME_QUERIES:
+        await prime_queries()
+
+
+async def close_resources() -> None:
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    await token_blocklist.aclose()
+    await redis_cache.aclose()
+
+
+class Lifecycle:
+    """Start-up state of the worker, behind /health/live and /health/ready.
+
+    Requests are served as soon as the lifespan starts, the warm-up runs in the
+    background. Readiness waits for it, so a load balancer only sends traffic to
+    workers with open pools, and turns false again while the worker shuts down.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.draining = False
+        self.warmup_attempts = 0
+        self.warmup_seconds = 0.0
+        self._warmup: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.ready = False
+        self.draining = False
+        self._warmup = asyncio.create_task(self._warm_up())
+
+    async def stop(self) -> None:
+        self.ready = False
+        self.draining = True
+        if self._warmup is not None:
+            self._warmup.cancel()
+            try:
+                await self._warmup
+            except asyncio.CancelledError:
+                pass
+            self._warmup = None
+
+    async def _warm_up(self) -> None:
+        start = time.perf_counter()
+        while True:
+            self.warmup_attempts += 1
+            try:
+                await warm_up()
+                break
+            except (SQLAlchemyError, OSError) as exc:
+                logger.warning(
+                    f"Warm-up failed, retrying in {Config.WARMUP_RETRY_AFTER}s: {exc}"
+                )
+                await asyncio.sleep(Config.WARMUP_RETRY_AFTER)
+
+        self.warmup_seconds = time.perf_counter() - start
+        self.ready = True
+        logger.info(f"Worker ready after a {self.warmup_seconds:.3f}s warm-up")
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "warmup_attempts": self.warmup_attempts,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+
+lifecycle = Lifecycle()
@@ -1,11 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .books.routes import book_router
 from .auth.auth_routers import auth_router
 from .reviews.review_routes import review_router
 from contextlib import asynccontextmanager
-from .db.db_main import init_db
+from .admission import AdmissionMiddleware, admission
+from .db.db_main import engine, pool_status, read_router, replica_engine
+from .auth.user_cache import user_cache
+from .books.book_cache import book_cache
+from .db.redis import blocklist
+from .lifecycle import close_resources, lifecycle
+from .metrics import MetricsMiddleware, render_metrics
+from .responses import FastJSONResponse
 import logging
 
 origins = [
@@ -13,12 +21,16 @@ origins = [
 ]
 
 
-# Creating connection within the database
+# The schema is Alembic's, start-up only warms the worker (app/lifecycle.py)
 @asynccontextmanager
 async def life_span(app: FastAPI):
     logging.info("SERVER IS STARTING.......")
-    await init_db()
+    lifecycle.start()
+    blocklist.start()
     yield
+    await lifecycle.stop()
+    await blocklist.stop()
+    await close_resources()
     logging.info("SERVER HAS STOPPED")
 
 
@@ -26,12 +38,16 @@ version = "v1"
 app = FastAPI(
     title="Bookly",
     description="Trial API for books",
-    version="v1",  # lifespan=life_span
+    version="v1",
+    lifespan=life_span,
     terms_of_service="",
     redoc_url=f"/{version}/redoc",
     openapi_url=f"/{version}/openapi.json",
     contact={"email": "test@test.com"},
+    default_response_class=FastJSONResponse,
 )
+# Innermost, so shed requests still get CORS headers and metrics
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,  # or ["*"] for all (not recommended in production)
@@ -39,6 +55,41 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 app.include_router(book_router, prefix="/books")
 app.include_router(auth_router, prefix="/auth")
 app.include_router(review_router, prefix="/reviews")
+
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition of the request metrics, pool and cache gauges
+    gauges = {
+        "bookly_app": lifecycle.stats(),
+        "bookly_admission": admission.stats(),
+        "bookly_db_pool": pool_status(engine),
+        "bookly_db_reads": read_router.stats(),
+        "bookly_user_cache": user_cache.stats(),
+        "bookly_book_cache": book_cache.stats(),
+        "bookly_token_blocklist": blocklist.stats(),
+    }
+    if replica_engine is not None:
+        gauges["bookly_db_replica_pool"] = pool_status(replica_engine)
+    return render_metrics(gauges)
+
+
+@app.get("/health/live", include_in_schema=False)
+async def live():
+    # Answered by the event loop alone, a stuck worker is the only failure
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def ready():
+    if not lifecycle.ready:
+        state = "draining" if lifecycle.draining else "warming_up"
+        return FastJSONResponse(
+            {"status": state}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return {"status": "ready"}
@@ -0,0 +1,266 @@
+"""Request metrics in the Prometheus text exposition format.
+
+Counters and histograms are plain dicts updated from the event loop thread, so
+recording a request costs a few dict updates and no locks or client library.
+SQL statements and Redis round trips are attributed to the request that issued
+them through a context variable set by MetricsMiddleware.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "unmatched"  # Unknown paths would add one series each
+
+
+class RequestStats:
+    __slots__ = ("sql_statements", "sql_seconds", "redis_calls", "redis_seconds")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.redis_calls = 0
+        self.redis_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format(value) -> str:
+    # Prometheus has no booleans
+    return str(int(value)) if isinstance(value, bool) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, labels)} {_format(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per series: one count per bucket plus +Inf (not cumulative), then the sum
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+                )
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+ROUTE_LABELS = ("method", "route")
+
+http_request_duration = Histogram(
+    "bookly_http_request_duration_seconds",
+    "Request latency by route template.",
+    ROUTE_LABELS + ("status",),
+)
+http_request_sql_statements = Counter(
+    "bookly_http_request_sql_statements_total",
+    "SQL statements issued while serving requests.",
+    ROUTE_LABELS,
+)
+http_request_sql_seconds = Counter(
+    "bookly_http_request_sql_seconds_total",
+    "Time spent executing SQL while serving requests.",
+    ROUTE_LABELS,
+)
+http_request_redis_calls = Counter(
+    "bookly_http_request_redis_calls_total",
+    "Redis round trips made while serving requests.",
+    ROUTE_LABELS,
+)
+http_request_redis_seconds = Counter(
+    "bookly_http_request_redis_seconds_total",
+    "Time spent waiting on Redis while serving requests.",
+    ROUTE_LABELS,
+)
+# Process-wide, including work outside requests (startup, background tasks)
+sql_statements = Counter("bookly_sql_statements_total", "SQL statements executed.")
+sql_seconds = Counter("bookly_sql_seconds_total", "Time spent executing SQL.")
+redis_calls = Counter("bookly_redis_calls_total", "Redis round trips.")
+redis_seconds = Counter("bookly_redis_seconds_total", "Time spent waiting on Redis.")
+# Admission control (app/admission.py), by route class
+admission_admitted = Counter(
+    "bookly_admission_admitted_total", "Requests admitted.", ("route_class",)
+)
+admission_queued = Counter(
+    "bookly_admission_queued_total",
+    "Requests that waited for a slot.",
+    ("route_class",),
+)
+admission_shed = Counter(
+    "bookly_admission_shed_total",
+    "Requests answered with 503 instead of being served.",
+    ("route_class", "reason"),
+)
+admission_queue_seconds = Histogram(
+    "bookly_admission_queue_seconds",
+    "Time queued requests waited for a slot.",
+    ("route_class",),
+)
+
+REGISTRY = (
+    http_request_duration,
+    http_request_sql_statements,
+    http_request_sql_seconds,
+    http_request_redis_calls,
+    http_request_redis_seconds,
+    sql_statements,
+    sql_seconds,
+    redis_calls,
+    redis_seconds,
+    admission_admitted,
+    admission_queued,
+    admission_shed,
+    admission_queue_seconds,
+)
+
+
+def record_sql(seconds: float) -> None:
+    sql_statements.inc()
+    sql_seconds.inc(amount=seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.sql_statements += 1
+        stats.sql_seconds += seconds
+
+
+def record_redis_call(seconds: float) -> None:
+    redis_calls.inc()
+    redis_seconds.inc(amount=seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.redis_calls += 1
+        stats.redis_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_sql(time.perf_counter() - vars(context).pop("metrics_start"))
+
+
+def _handle_error(exception_context):
+    # Failed statements (timeouts included) count too, errors after execution don't
+    context = exception_context.execution_context
+    start = vars(context).pop("metrics_start", None) if context is not None else None
+    if start is not None:
+        record_sql(time.perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and files it under its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500  # Unless the app starts a response
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE))
+            http_request_duration.observe(labels + (str(status_code),), elapsed)
+            if stats.sql_statements:
+                http_request_sql_statements.inc(labels, stats.sql_statements)
+                http_request_sql_seconds.inc(labels, stats.sql_seconds)
+            if stats.redis_calls:
+                http_request_redis_calls.inc(labels, stats.redis_calls)
+                http_request_redis_seconds.inc(labels, stats.redis_seconds)
+
+
+def render_metrics(gauges: Dict[str, dict]) -> str:
+    """Registry metrics, then each gauge group as ``<prefix>_<name> <value>``."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for prefix, values in gauges.items():
+        for name, value in values.items():
+            lines.append(f"{prefix}_{name} {_format(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+import hashlib
+import uuid
+
+try:
+    import orjson
+except ImportError:  # Optional, pydantic-core's encoder is nearly as fast
+    orjson = None
+
+
+def _default(value):
+    # orjson only knows uuid.UUID itself, asyncpg returns a subclass
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    # Both encode UUIDs and datetimes natively, no jsonable_encoder pass needed
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class, encodes straight to bytes.
+
+    List endpoints return it directly with plain rows, which skips response_model
+    validation entirely; their response_model only documents the shape.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# Conditional GETs. Validators come from updated_at, maintained on every write,
+# so a 304 can be decided before the response body is built.
+def entity_tag(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def page_entity_tag(items: Iterable, next_cursor: Optional[str], *extra) -> str:
+    # A page changes when any of its rows changes, or rows enter or leave it
+    return entity_tag(
+        *(f"{row['uid']}@{row['updated_at'].isoformat()}" for row in items),
+        next_cursor,
+        *extra,
+    )
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    # Authenticated responses, clients may store them but must revalidate
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        # Naive timestamps are server local time, as written by datetime.now()
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Takes precedence over If-Modified-Since, compared weakly (RFC 9110)
+        if if_none_match.strip() == "*":
+            return True
+        tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        return headers["ETag"] in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
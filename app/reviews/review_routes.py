@@ -1,11 +1,29 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, status
+from typing import Annotated, List
+from fastapi.exceptions import HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.auth.auth_dependencies import RoleChecker
-from app.db.models import User
+from app.auth.auth_dependencies import (
+    RoleChecker,
+    access_token_bearer,
+    get_read_session,
+)
 from app.db.db_main import get_session
-from app.auth.auth_dependencies import get_current_user
-from .review_schemas import ReviewCreateModel
+from app.db.query_budget import QueryBudget
+from app.responses import (
+    FastJSONResponse,
+    is_not_modified,
+    not_modified,
+    page_entity_tag,
+    validator_headers,
+)
+from .review_schemas import (
+    ReviewBulkCreateModel,
+    ReviewCreateModel,
+    ReviewModel,
+    ReviewPage,
+    ReviewQuery,
+)
 from .review_service import ReviewService
 
 review_service = ReviewService()
@@ -13,24 +31,86 @@ review_router = APIRouter(tags=["Reviews"])
 role_checker = RoleChecker(["user", "admin"])
 
 
-@review_router.post("/review/{book_uuid}")
+@review_router.post(
+    "/review/{book_uuid}",
+    dependencies=[Depends(QueryBudget(3)), Depends(role_checker)],
+)
 async def add_review_to_books(
     book_uuid: str,
     review_data: ReviewCreateModel,
-    current_user: User = Depends(get_current_user),
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
 ):
     new_review = await review_service.add_review_to_book(
-        current_user.email, book_uuid, review_data, session
+        token_details["user"]["user_uid"], book_uuid, review_data, session
     )
 
     return new_review
 
 
-@review_router.get("/", dependencies=[Depends(role_checker)])
+@review_router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[ReviewModel],
+    # The lookup of unknown books only runs when the insert is rejected
+    dependencies=[Depends(QueryBudget(4)), Depends(role_checker)],
+)
+async def import_reviews(
+    bulk_data: ReviewBulkCreateModel,
+    token_details: dict = Depends(access_token_bearer),
+    session: AsyncSession = Depends(get_session),
+):
+    new_reviews = await review_service.import_reviews(
+        token_details["user"]["user_uid"], bulk_data.reviews, session
+    )
+
+    return FastJSONResponse(new_reviews, status_code=status.HTTP_201_CREATED)
+
+
+@review_router.get(
+    "/",
+    response_model=ReviewPage,
+    dependencies=[Depends(QueryBudget(2)), Depends(role_checker)],
+)
 async def get_all_reviews(
+    request: Request,
+    query: Annotated[ReviewQuery, Query()],
+    session: AsyncSession = Depends(get_read_session),
+):
+    if "if-none-match" in request.headers:
+        validators = await review_service.get_review_page_validators(
+            session, query.limit, query.cursor, query
+        )
+        headers = validator_headers(
+            page_entity_tag(validators["items"], validators["next_cursor"])
+        )
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+
+    page = await review_service.get_reviews(session, query.limit, query.cursor, query)
+    headers = validator_headers(page_entity_tag(page["items"], page["next_cursor"]))
+
+    return FastJSONResponse(page, headers=headers)
+
+
+@review_router.delete(
+    "/{review_uuid}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(QueryBudget(3)), Depends(role_checker)],
+)
+async def delete_review(
+    review_uuid: str,
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
 ):
-    book_reviews = await review_service.get_all_reviews(session)
+    # Authors delete their own reviews, admins any review
+    user = token_details["user"]
+    deleted = await review_service.delete_review(
+        review_uuid, user["user_uid"], user.get("role") == "admin", session
+    )
 
-    return book_reviews
+    if deleted is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Review Not Found"
+        )
+    return {}
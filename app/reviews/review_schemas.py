@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 import uuid
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
 
 class ReviewModel(BaseModel):
     uid: uuid.UUID
@@ -14,6 +16,45 @@ class ReviewModel(BaseModel):
     updated_at: datetime
 
 
+class ReviewPage(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
+
+class ReviewFilters(BaseModel):
+    """Query filters of GET /reviews/, the time window is [created_after, created_before)."""
+
+    book_uid: Optional[uuid.UUID] = None
+    user_uid: Optional[uuid.UUID] = None
+    min_rating: Optional[int] = Field(default=None, lt=5)
+    max_rating: Optional[int] = Field(default=None, lt=5)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @field_validator("created_after", "created_before")
+    @classmethod
+    def to_server_time(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored timestamps are naive server local time, as written by datetime.now()
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+
+class ReviewQuery(ReviewFilters):
+    # Query parameter models must hold every query parameter of the route
+    limit: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(lt=5)
     review_text: str
+
+
+class ReviewImportModel(ReviewCreateModel):
+    book_uid: uuid.UUID
+
+
+class ReviewBulkCreateModel(BaseModel):
+    # One multi-row INSERT, SQLAlchemy splits larger batches into several
+    reviews: List[ReviewImportModel] = Field(min_length=1, max_length=1000)
@@ -1,57 +1,223 @@
-from app.db.models import Review
 from app.auth.auth_service import AuthService
-from app.books.services import BookService
-from .review_schemas import ReviewCreateModel
+from app.db.models import Review
+from app.books.services import BookService, REVIEW_RESPONSE_COLUMNS, parse_uid
+from app.books.book_cache import book_cache
+from app.db.pagination import DEFAULT_PAGE_SIZE, build_page, keyset_before
+from .review_schemas import ReviewCreateModel, ReviewFilters, ReviewImportModel
 
 from fastapi.exceptions import HTTPException
 from fastapi import status
-from sqlmodel import select, desc
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, desc, delete
 from sqlmodel.ext.asyncio.session import AsyncSession
+from collections import defaultdict
+from datetime import datetime
+from typing import List, NoReturn, Optional
 
 book_service = BookService()
 user_service = AuthService()
 
+# Postgres' default names for the foreign keys of the reviews table
+MISSING_REFERENCE_DETAILS = {
+    "reviews_book_uid_fkey": "Book does not exist",
+    "reviews_user_uid_fkey": "User does not exist",
+}
+
+
+def raise_for_missing_reference(exc: IntegrityError) -> NoReturn:
+    constraint = getattr(exc.orig.__cause__, "constraint_name", None)
+    if constraint not in MISSING_REFERENCE_DETAILS:
+        raise exc
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=MISSING_REFERENCE_DETAILS[constraint],
+    )
+
 
 class ReviewService:
 
     async def add_review_to_book(
         self,
-        user_email: str,
+        user_uid: str,
         book_uuid: str,
         review_data: ReviewCreateModel,
         session: AsyncSession,
     ):
+        book_uid = parse_uid(book_uuid)
+        if book_uid is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book does not exist"
+            )
+
+        # No book or user lookup, their foreign keys reject unknown uids
+        statement = (
+            insert(Review)
+            .values(**review_data.model_dump(), user_uid=user_uid, book_uid=book_uid)
+            .returning(*REVIEW_RESPONSE_COLUMNS)
+        )
         try:
-            book = await book_service.get_book(book_uuid, session)
-            user = await user_service.get_user_by_email(user_email, session)
+            result = await session.exec(statement)
+        except IntegrityError as exc:
+            await session.rollback()
+            raise_for_missing_reference(exc)
+        new_review = result.one()._asdict()
 
-            review_data_dict = review_data.model_dump()
-            new_review = Review(**review_data_dict)
+        await book_service.adjust_review_stats(
+            book_uid, 1, new_review["rating"], session
+        )
+        await user_service.adjust_user_counts(user_uid, session, review_delta=1)
+        await session.commit()
+        await book_cache.invalidate(book_uid)
 
-            if not book:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="Book does not exist"
-                )
+        return new_review
+
+    async def import_reviews(
+        self,
+        user_uid: str,
+        reviews: List[ReviewImportModel],
+        session: AsyncSession,
+    ) -> List[dict]:
+        """Insert a batch of reviews and their rating aggregates atomically.
 
-            if not user:
+        Either every review is stored or, if any book is unknown, none is.
+        """
+        # One multi-row INSERT in book uid order: its foreign key checks lock the
+        # books in the order book deletes and adjust_many_review_stats do. The
+        # timestamps still follow the order the reviews were sent in.
+        rows = [
+            {**review.model_dump(), "user_uid": user_uid, "created_at": datetime.now()}
+            for review in reviews
+        ]
+        order = sorted(range(len(reviews)), key=lambda i: reviews[i].book_uid)
+        rows = [rows[i] for i in order]
+        statement = insert(Review).returning(
+            *REVIEW_RESPONSE_COLUMNS, sort_by_parameter_order=True
+        )
+        try:
+            result = await session.exec(statement, params=rows)
+        except IntegrityError as exc:
+            await session.rollback()
+            missing = await book_service.missing_book_uids(
+                {review.book_uid for review in reviews}, session
+            )
+            if missing:
                 raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="User does not exist"
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Books do not exist: {', '.join(map(str, missing))}",
                 )
+            raise_for_missing_reference(exc)
+        # Back to the order they were sent in
+        new_reviews = [None] * len(reviews)
+        for i, row in zip(order, result):
+            new_reviews[i] = row._asdict()
 
-            new_review.user = user
-            new_review.book = book
+        stats = defaultdict(lambda: [0, 0])
+        for review in new_reviews:
+            stats[review["book_uid"]][0] += 1
+            stats[review["book_uid"]][1] += review["rating"]
+        await book_service.adjust_many_review_stats(stats, session)
+        await user_service.adjust_user_counts(
+            user_uid, session, review_delta=len(new_reviews)
+        )
+        await session.commit()
+        for book_uid in stats:
+            await book_cache.invalidate(book_uid)
 
-            session.add(new_review)
-            await session.commit()
+        return new_reviews
 
-            return new_review
-
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e
+    def _review_page_statement(
+        self,
+        columns: tuple,
+        limit: int,
+        cursor: Optional[str],
+        filters: Optional[ReviewFilters],
+    ):
+        filters = filters or ReviewFilters()
+        # Every filter combination leads with an equality or range on an indexed
+        # column followed by (created_at, uid), see the indexes of Review
+        statement = (
+            select(*columns)
+            .order_by(desc(Review.created_at), desc(Review.uid))
+            .limit(limit + 1)
+        )
+        if filters.book_uid is not None:
+            statement = statement.where(Review.book_uid == filters.book_uid)
+        if filters.user_uid is not None:
+            statement = statement.where(Review.user_uid == filters.user_uid)
+        if filters.min_rating is not None:
+            statement = statement.where(Review.rating >= filters.min_rating)
+        if filters.max_rating is not None:
+            statement = statement.where(Review.rating <= filters.max_rating)
+        if filters.created_after is not None:
+            statement = statement.where(Review.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            statement = statement.where(Review.created_at < filters.created_before)
+        if cursor is not None:
+            statement = statement.where(
+                keyset_before(Review.created_at, Review.uid, cursor)
             )
+        return statement
+
+    async def get_reviews(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        filters: Optional[ReviewFilters] = None,
+    ):
+        statement = self._review_page_statement(
+            REVIEW_RESPONSE_COLUMNS, limit, cursor, filters
+        )
+
+        result = await session.exec(statement)
+        page = build_page(result.all(), limit)
+        page["items"] = [row._asdict() for row in page["items"]]
+        return page
+
+    async def get_review_page_validators(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        filters: Optional[ReviewFilters] = None,
+    ):
+        # Same rows as the page itself, but only what its ETag is computed from
+        columns = (Review.uid, Review.updated_at, Review.created_at)
+        statement = self._review_page_statement(columns, limit, cursor, filters)
+
+        result = await session.exec(statement)
+        page = build_page(result.all(), limit)
+        page["items"] = [row._asdict() for row in page["items"]]
+        return page
+
+    async def delete_review(
+        self, review_uuid: str, user_uid: str, is_admin: bool, session: AsyncSession
+    ):
+        review_uid = parse_uid(review_uuid)
+        if review_uid is None:
+            return None
+
+        statement = (
+            delete(Review)
+            .where(Review.uid == review_uid)
+            .returning(Review.book_uid, Review.user_uid, Review.rating)
+        )
+        if not is_admin:
+            statement = statement.where(Review.user_uid == user_uid)
+
+        result = await session.exec(statement)
+        deleted = result.first()
+        if deleted is None:
+            return None
+
+        book_uid, author_uid, rating = deleted
+        if book_uid is not None:
+            await book_service.adjust_review_stats(book_uid, -1, -rating, session)
+        if author_uid is not None:
+            await user_service.adjust_user_counts(author_uid, session, review_delta=-1)
+        await session.commit()
+        if book_uid is not None:
+            await book_cache.invalidate(book_uid)
 
-    async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
-        reviews = await session.exec(statement)
-        return reviews.all()
+        return {}
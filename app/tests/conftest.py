@@ -1,15 +1,34 @@
 from app.db.db_main import get_session
 from app.main import app
-from app.db.db_main import get_session
+from app.db import db_main
+from app.db.db_main import get_session, read_router
+from app.db.replica import read_only_sessionmaker
+from app.auth.user_cache import user_cache
+from app.books.book_cache import book_cache
+from app.metrics import instrument_engine
+from app.db.query_budget import track_queries
+from app.config import Config
 from app.auth.auth_dependencies import (
     AccessTokenBearer,
     RefreshTokenBearer,
     RoleChecker,
+    get_read_session,
 )
 from fastapi.testclient import TestClient
 from unittest.mock import Mock
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+import asyncio
+import os
 import pytest
 
+# Integration tests run against a real, disposable Postgres database, e.g.
+# TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/bookly_test
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
 mock_session = Mock()
 mock_user_service = Mock()
 mock_book_service = Mock()
@@ -25,7 +44,14 @@ role_checker = RoleChecker(["admin", "user"])
 
 
 app.dependency_overrides[get_session] = get_mock_session
+app.dependency_overrides[get_read_session] = get_mock_session
 app.dependency_overrides[role_checker] = Mock()
+# Integration tests fail when an endpoint goes over its route's QueryBudget
+Config.QUERY_BUDGET_MODE = "raise"
+# Readiness without a warm-up, its queries would land in the statement logs
+Config.WARMUP_DB_CONNECTIONS = 0
+Config.WARMUP_REDIS_CONNECTIONS = 0
+Config.WARMUP_PRIME_QUERIES = False
 app.dependency_overrides[refresh_token_bearer] = Mock()
 
 
@@ -47,3 +73,94 @@ def test_client():
 @pytest.fixture
 def fake_book_service():
     return mock_book_service
+
+
+class StatementLog:
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def clear(self):
+        self.statements.clear()
+        self.parameters.clear()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+async def _reset_schema(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+@pytest.fixture
+def db_engine():
+    if TEST_DATABASE_URL is None:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    # NullPool, TestClient runs the app on its own event loop
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    instrument_engine(engine)
+    track_queries(engine)
+    asyncio.run(_reset_schema(engine))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def statement_log(db_engine):
+    log = StatementLog()
+    event.listen(db_engine.sync_engine, "before_cursor_execute", log)
+    yield log
+    event.remove(db_engine.sync_engine, "before_cursor_execute", log)
+
+
+@pytest.fixture
+def db_client(db_engine, monkeypatch):
+    async def token_not_revoked(jti):
+        return False
+
+    monkeypatch.setattr(
+        "app.auth.auth_dependencies.token_in_blocklist", token_not_revoked
+    )
+    monkeypatch.setattr(book_cache, "enabled", False)
+    # The real session dependencies, bound to the test database. Reads stay on
+    # it too unless a test configures a replica (test_replica.py).
+    del app.dependency_overrides[get_session]
+    del app.dependency_overrides[get_read_session]
+    monkeypatch.setattr(
+        db_main,
+        "async_session_maker",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    monkeypatch.setattr(read_router, "primary", read_only_sessionmaker(db_engine))
+    monkeypatch.setattr(read_router, "replica", None)
+    user_cache.clear()  # Records would point at rows of a previous test database
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides[get_session] = get_mock_session
+    app.dependency_overrides[get_read_session] = get_mock_session
+    user_cache.clear()
+
+
+@pytest.fixture
+def auth_headers(db_client):
+    credentials = {"email": "reader@bookly.test", "password": "password1"}
+    db_client.post(
+        "/auth/sign_up/",
+        json={
+            **credentials,
+            "username": "reader",
+            "first_name": "Book",
+            "last_name": "Reader",
+        },
+    )
+    response = db_client.post("/auth/login/", json=credentials)
+
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
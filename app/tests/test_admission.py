@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+import redis.asyncio as redis
+
+from app.admission import (
+    Limiter,
+    Overloaded,
+    Saturation,
+    admission,
+    redis_at_capacity,
+    route_class,
+)
+from app.db.redis import InstrumentedRedis
+
+
+@pytest.mark.parametrize(
+    "method,path,expected",
+    [
+        ("POST", "/auth/login", "auth"),
+        ("GET", "/auth/me/", "auth"),
+        ("GET", "/books/", "book_reads"),
+        ("GET", "/books/0e1f2a3b-4c5d-4e6f-8a9b-0c1d2e3f4a5b", "book_reads"),
+        ("GET", "/books/0e1f2a3b-4c5d-4e6f-8a9b-0c1d2e3f4a5b/reviews", "reviews"),
+        ("GET", "/reviews/", "reviews"),
+        ("PATCH", "/books/0e1f2a3b-4c5d-4e6f-8a9b-0c1d2e3f4a5b", "writes"),
+        ("POST", "/reviews/bulk", "writes"),
+        ("GET", "/health/ready", None),
+        ("GET", "/metrics", None),
+    ],
+)
+def test_route_classes(method, path, expected):
+    assert route_class(method, path) == expected
+
+
+def test_limiter_queues_in_order_and_sheds():
+    async def scenario():
+        limiter = Limiter("writes", concurrency=1, queue_size=2, queue_timeout=0.05)
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        first = asyncio.create_task(wait("first"))
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire()
+
+        limiter.release()
+        await first
+        limiter.release()
+        await second
+        # The queue is empty again, a waiter without a release times out
+        with pytest.raises(Overloaded) as late:
+            await limiter.acquire()
+        limiter.release()
+        return order, full.value.reason, late.value.reason, limiter
+
+    order, full, late, limiter = asyncio.run(scenario())
+    assert order == ["first", "second"]
+    assert (full, late) == ("queue_full", "queue_timeout")
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+
+def test_slot_handed_over_at_the_deadline_is_kept(monkeypatch):
+    limiter = Limiter("writes", concurrency=1, queue_size=1, queue_timeout=0.05)
+
+    async def wait_for_as_on_python_312(waiter, timeout):
+        # release() hands the slot over as the deadline fires, wait_for still
+        # raises TimeoutError
+        limiter.release()
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        await limiter.acquire()
+        monkeypatch.setattr(asyncio, "wait_for", wait_for_as_on_python_312)
+        await limiter.acquire()  # Admitted, not shed
+        monkeypatch.undo()
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+
+    asyncio.run(scenario())
+    assert limiter.active == 0
+
+
+def test_release_just_before_the_deadline_leaks_no_slot():
+    async def scenario():
+        limiter = Limiter("writes", concurrency=1, queue_size=1, queue_timeout=0.05)
+        await limiter.acquire()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.0499, limiter.release)
+        try:
+            await limiter.acquire()
+        except Overloaded:
+            pass  # The deadline won, the released slot went back to the pool
+        else:
+            limiter.release()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+
+def test_saturation_needs_the_grace_period():
+    at_capacity = True
+    saturation = Saturation(lambda: at_capacity, grace=0.0)
+    assert saturation.saturated() is True
+
+    saturation = Saturation(lambda: at_capacity, grace=60.0)
+    assert saturation.saturated() is False
+    at_capacity = False
+    assert saturation.saturated() is False
+
+
+def test_redis_capacity_counts_commands_in_flight(monkeypatch):
+    monkeypatch.setattr("app.admission.Config.REDIS_MAX_CONNECTIONS", 1)
+    client = InstrumentedRedis()
+    seen = []
+
+    async def execute_command(self, *args, **options):
+        seen.append(redis_at_capacity(client))
+        raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(redis.Redis, "execute_command", execute_command)
+
+    with pytest.raises(redis.ConnectionError):
+        asyncio.run(client.get("key"))
+    assert seen == [True]
+    assert (client.in_flight, redis_at_capacity(client)) == (0, False)
+
+
+def test_saturated_pool_sheds_with_retry_after(test_client, monkeypatch):
+    monkeypatch.setitem(
+        admission.resources, "db_reads", Saturation(lambda: True, grace=0.0)
+    )
+
+    response = test_client.get("/books/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # Health checks are never limited
+    assert test_client.get("/health/live").status_code == 200
+    assert admission.limiters["book_reads"].active == 0
+
+    metrics = test_client.get("/metrics").text
+    assert (
+        'bookly_admission_shed_total{route_class="book_reads",reason="db_reads_saturated"}'
+        in metrics
+    )
+    assert "bookly_admission_db_reads_saturated 1" in metrics
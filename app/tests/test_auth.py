@@ -1,4 +1,17 @@
+from fastapi.exceptions import HTTPException
+from passlib.hash import bcrypt
+import asyncio
+import pytest
+
 from app.auth.auth_schemas import UserCreateModel
+from app.auth.auth_dependencies import RoleChecker
+from app.auth.auth_utils import (
+    _run_hashing,
+    hash_rounds,
+    password_slots,
+    verify_and_rehash,
+)
+from app.config import Config
 
 auth_prefix = f"/api/auth"
 
@@ -22,3 +35,47 @@ def test_user_creation(fake_session, fake_user_service, test_client):
     assert fake_user_service.create_user_called_once_with(
         signup_data["email"], fake_session
     )
+
+
+def test_role_checker_authorizes_from_token_claims(fake_session):
+    token_details = {"user": {"email": "a@b.c", "role": "user"}}
+
+    assert asyncio.run(RoleChecker(["admin", "user"])(token_details, fake_session))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(RoleChecker(["admin"])(token_details, fake_session))
+
+    assert exc.value.status_code == 403
+    fake_session.exec.assert_not_called()
+
+
+def test_login_rehashes_password_when_cost_changes():
+    old_hash = bcrypt.using(rounds=4).hash("password1")
+
+    valid, new_hash = asyncio.run(verify_and_rehash("password1", old_hash))
+    assert valid
+    assert hash_rounds(new_hash) == Config.PASSWORD_HASH_ROUNDS
+
+    assert asyncio.run(verify_and_rehash("password1", new_hash)) == (True, None)
+    assert asyncio.run(verify_and_rehash("wrong-password", old_hash)) == (False, None)
+
+
+def test_busy_hashing_workers_shed_without_leaking_slots(monkeypatch):
+    monkeypatch.setattr(Config, "PASSWORD_HASH_QUEUE_TIMEOUT", 0.01)
+
+    async def scenario():
+        slots = password_slots()
+        for _ in range(Config.PASSWORD_HASH_WORKERS):
+            await slots.acquire()
+        with pytest.raises(HTTPException) as exc:
+            await _run_hashing(len, "password1")
+        for _ in range(Config.PASSWORD_HASH_WORKERS):
+            slots.release()
+
+        assert exc.value.status_code == 503
+        assert await _run_hashing(len, "password1") == 9
+        return slots
+
+    slots = asyncio.run(scenario())
+    assert slots._value == Config.PASSWORD_HASH_WORKERS
+    # Each event loop gets its own semaphore
+    assert asyncio.run(scenario()) is not slots
@@ -0,0 +1,149 @@
+from unittest.mock import AsyncMock, Mock
+import asyncio
+import time
+
+import redis.asyncio as redis
+
+from app.auth.auth_utils import create_access_token
+from app.db.redis import TokenBlocklist
+
+
+class FakePipeline:
+    def __init__(self):
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return []
+
+
+def test_revoked_jti_expires_with_the_token():
+    pipeline = FakePipeline()
+    client = Mock(pipeline=Mock(return_value=pipeline))
+    blocklist = TokenBlocklist(client)
+
+    asyncio.run(blocklist.add("jti-1", exp=time.time() + 120))
+
+    name, args, kwargs = pipeline.commands[0]
+    assert name == "set"
+    assert kwargs["name"] == "jti-1"
+    assert 119 <= kwargs["ex"] <= 121
+    assert [command[0] for command in pipeline.commands][-1] == "publish"
+
+
+def test_synced_lookups_make_no_redis_calls():
+    client = Mock(get=AsyncMock())
+    blocklist = TokenBlocklist(client)
+    blocklist.start = Mock()
+    blocklist.synced = True
+    blocklist._last_seen = time.monotonic()
+    blocklist._remember("revoked", time.time() + 60)
+
+    assert asyncio.run(blocklist.contains("revoked"))
+    assert not asyncio.run(blocklist.contains("fresh"))
+    client.get.assert_not_called()
+    assert blocklist.stats()["local_hits"] == 2
+
+
+def test_unsynced_lookups_go_to_redis():
+    client = Mock(get=AsyncMock(return_value=""))
+    blocklist = TokenBlocklist(client)
+    blocklist.start = Mock()
+
+    assert asyncio.run(blocklist.contains("revoked"))
+    client.get.assert_awaited_once_with("revoked")
+    assert blocklist.stats()["redis_lookups"] == 1
+
+
+def test_stale_mirror_falls_back_to_redis():
+    client = Mock(get=AsyncMock(return_value=None))
+    blocklist = TokenBlocklist(client, max_staleness=15.0)
+    blocklist.start = Mock()
+    blocklist.synced = True
+    blocklist._last_seen = time.monotonic() - 16.0
+
+    assert not asyncio.run(blocklist.contains("revoked-elsewhere"))
+    client.get.assert_awaited_once_with("revoked-elsewhere")
+    assert blocklist.stats()["synced"] == 0
+
+
+class FakePubSub:
+    """Confirms the subscription, then replays ``messages`` and goes silent."""
+
+    def __init__(self, messages):
+        self.messages = [{"type": "subscribe", "data": 1}, *messages]
+        self.pings = 0
+
+    async def subscribe(self, channel):
+        pass
+
+    async def get_message(self, timeout=None):
+        if self.messages:
+            return self.messages.pop(0)
+        await asyncio.sleep(timeout)
+        return None
+
+    async def ping(self):
+        self.pings += 1  # Never answered, like a half-open connection
+
+    async def aclose(self):
+        pass
+
+
+def test_listener_skips_malformed_messages_and_resyncs_when_silent():
+    exp = time.time() + 60
+    first = FakePubSub(
+        [
+            {"type": "message", "data": "garbage"},
+            {"type": "message", "data": f"revoked {exp}"},
+        ]
+    )
+    subscriptions = [first]
+    client = Mock(
+        # A new subscription per attempt, the later ones stay silent too
+        pubsub=Mock(
+            side_effect=lambda: subscriptions.pop() if subscriptions else FakePubSub([])
+        ),
+        zrangebyscore=AsyncMock(return_value=[]),
+    )
+    blocklist = TokenBlocklist(
+        client, retry_after=0.01, ping_interval=0.01, max_staleness=0.05
+    )
+
+    async def scenario():
+        listener = asyncio.create_task(blocklist._follow())
+        await asyncio.sleep(0.03)
+        synced_with_revocation = blocklist._fresh() and "revoked" in blocklist._revoked
+        await asyncio.sleep(0.1)
+        listener.cancel()
+        return synced_with_revocation
+
+    assert asyncio.run(scenario())
+    # The silent subscription was pinged, given up and replaced
+    assert first.pings >= 1
+    assert client.pubsub.call_count >= 2
+
+
+def test_unreachable_blocklist_answers_503(test_client, monkeypatch):
+    async def redis_down(jti):
+        raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr("app.auth.auth_dependencies.token_in_blocklist", redis_down)
+    token = create_access_token(
+        {"email": "reader@bookly.test", "user_uid": "a0b0", "role": "user"}
+    )
+
+    response = test_client.get(
+        "/auth/me/", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,148 @@
+from datetime import datetime
+import asyncio
+import uuid
+
+import redis.asyncio as redis
+
+from app.books.book_cache import BookCache, decode_book, encode_book
+from app.db.models import Book
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, lease, payload, ttl):
+        # FILL_SCRIPT
+        if self.data.get(key) == lease:
+            self.data[key] = payload
+            return True
+        return None
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class BrokenRedis(FakeRedis):
+    async def get(self, key):
+        raise redis.ConnectionError("connection refused")
+
+
+def make_book():
+    return Book(
+        uid=uuid.uuid4(),
+        title="Dune",
+        publisher="Chilton",
+        published_date=datetime(1965, 8, 1),
+        page_count=412,
+        language="en",
+        user_uid=uuid.uuid4(),
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+class CountingLoader:
+    def __init__(self, book):
+        self.book = book
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.book
+
+
+def test_codec_round_trip():
+    book = make_book()
+
+    assert decode_book(encode_book(book)).model_dump() == book.model_dump()
+
+
+def test_concurrent_misses_run_one_load():
+    book = make_book()
+    cache = BookCache(FakeRedis(), ttl=60, negative_ttl=5)
+    loader = CountingLoader(book)
+
+    async def burst():
+        return await asyncio.gather(
+            *(cache.get_or_load(book.uid, loader) for _ in range(50))
+        )
+
+    results = asyncio.run(burst())
+
+    assert loader.calls == 1
+    assert all(result.title == "Dune" for result in results)
+    asyncio.run(cache.get_or_load(book.uid, loader))
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_unknown_uid_is_negatively_cached_until_invalidated():
+    book_uid = uuid.uuid4()
+    cache = BookCache(FakeRedis(), ttl=60, negative_ttl=5)
+    loader = CountingLoader(None)
+
+    assert asyncio.run(cache.get_or_load(book_uid, loader)) is None
+    assert asyncio.run(cache.get_or_load(book_uid, loader)) is None
+    assert loader.calls == 1
+
+    asyncio.run(cache.invalidate(book_uid))
+    asyncio.run(cache.get_or_load(book_uid, loader))
+    assert loader.calls == 2
+
+
+def test_redis_errors_fall_back_to_the_loader():
+    book = make_book()
+    cache = BookCache(BrokenRedis(), ttl=60, negative_ttl=5)
+    loader = CountingLoader(book)
+
+    assert asyncio.run(cache.get_or_load(book.uid, loader)) is book
+    assert asyncio.run(cache.get_or_load(book.uid, loader)) is book
+    assert loader.calls == 2
+    assert cache.stats()["errors"] == 1  # Backs off after the first failure
+
+
+def test_load_racing_an_update_does_not_refill_the_old_row():
+    book = make_book()
+    client = FakeRedis()
+    cache = BookCache(client, ttl=60, negative_ttl=5)
+    updated = book.model_copy(update={"title": "Dune Messiah"})
+
+    async def stale_loader():
+        # Read the row, then the update commits and invalidates before the fill
+        row = book
+        await cache.invalidate(book.uid)
+        return row
+
+    async def fresh_loader():
+        return updated
+
+    assert asyncio.run(cache.get_or_load(book.uid, stale_loader)).title == "Dune"
+    assert client.data == {}
+    assert asyncio.run(cache.get_or_load(book.uid, fresh_loader)).title == (
+        "Dune Messiah"
+    )
+    assert decode_book(client.data[cache._key(book.uid)]).title == "Dune Messiah"
+
+
+def test_lease_held_elsewhere_reads_through_without_filling():
+    book = make_book()
+    client = FakeRedis()
+    cache = BookCache(client, ttl=60, negative_ttl=5)
+    key = cache._key(book.uid)
+    client.data[key] = b"lease:other-worker"
+    loader = CountingLoader(book)
+
+    assert asyncio.run(cache.get_or_load(book.uid, loader)).title == "Dune"
+    assert client.data[key] == b"lease:other-worker"
+    assert cache.stats()["misses"] == 1
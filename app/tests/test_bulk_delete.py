@@ -0,0 +1,115 @@
+from app.auth.auth_utils import create_access_token
+from app.books import services
+from app.books.schemas import BookBulkDeleteModel
+
+import pytest
+from pydantic import ValidationError
+
+book_data = {
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+@pytest.fixture
+def admin_headers(db_client, auth_headers):
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+    # RoleChecker authorizes from the token's role claim
+    token = create_access_token(
+        user_data={"email": me["email"], "user_uid": me["uid"], "role": "admin"}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_books(db_client, auth_headers, count, **fields):
+    return [
+        db_client.post(
+            "/books/",
+            json={**book_data, "title": f"Book {i}", **fields},
+            headers=auth_headers,
+        ).json()
+        for i in range(count)
+    ]
+
+
+def test_selection_needs_uids_or_a_filter():
+    with pytest.raises(ValidationError):
+        BookBulkDeleteModel()
+    with pytest.raises(ValidationError):
+        BookBulkDeleteModel(filters={})
+    with pytest.raises(ValidationError):
+        BookBulkDeleteModel(uids=[], filters={"language": "en"})
+
+
+def test_deleting_a_book_deletes_its_reviews(db_client, auth_headers):
+    book, other = add_books(db_client, auth_headers, 2)
+    for target in (book, book, other):
+        db_client.post(
+            f"/reviews/review/{target['uid']}",
+            json={"rating": 3, "review_text": "..."},
+            headers=auth_headers,
+        )
+
+    response = db_client.delete(f"/books/{book['uid']}", headers=auth_headers)
+    assert response.status_code == 204
+
+    reviews = db_client.get("/reviews/", headers=auth_headers).json()["items"]
+    assert [review["book_uid"] for review in reviews] == [other["uid"]]
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+    assert (me["book_count"], me["review_count"]) == (1, 1)
+
+
+def test_bulk_delete_by_uid_in_chunks(
+    db_client, auth_headers, admin_headers, monkeypatch
+):
+    monkeypatch.setattr(services, "BULK_DELETE_CHUNK_SIZE", 2)
+    books = add_books(db_client, auth_headers, 5)
+    db_client.post(
+        f"/reviews/review/{books[0]['uid']}",
+        json={"rating": 3, "review_text": "..."},
+        headers=auth_headers,
+    )
+
+    uids = [book["uid"] for book in books[:4]]
+    response = db_client.post(
+        "/books/bulk-delete",
+        json={"uids": uids + ["0e1f2a3b-4c5d-4e6f-8a9b-0c1d2e3f4a5b"]},
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 4, "reviews_deleted": 1, "more": False}
+    remaining = db_client.get("/auth/me/books", headers=auth_headers).json()
+    assert [book["uid"] for book in remaining["items"]] == [books[4]["uid"]]
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+    assert (me["book_count"], me["review_count"]) == (1, 0)
+
+
+def test_bulk_delete_by_filter_stops_at_the_cap(
+    db_client, auth_headers, admin_headers, monkeypatch
+):
+    monkeypatch.setattr(services, "BULK_DELETE_CHUNK_SIZE", 2)
+    monkeypatch.setattr(services, "BULK_DELETE_MAX_BOOKS", 3)
+    add_books(db_client, auth_headers, 4, language="fr")
+    kept = add_books(db_client, auth_headers, 1)
+
+    selection = {"filters": {"language": "fr"}}
+    first = db_client.post("/books/bulk-delete", json=selection, headers=admin_headers)
+    second = db_client.post("/books/bulk-delete", json=selection, headers=admin_headers)
+
+    assert first.json() == {"deleted": 3, "reviews_deleted": 0, "more": True}
+    assert second.json() == {"deleted": 1, "reviews_deleted": 0, "more": False}
+    remaining = db_client.get("/books/", headers=auth_headers).json()["items"]
+    assert [book["uid"] for book in remaining] == [kept[0]["uid"]]
+
+
+def test_bulk_delete_is_for_admins(db_client, auth_headers):
+    response = db_client.post(
+        "/books/bulk-delete",
+        json={"filters": {"language": "en"}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 403
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+update_data = {"title": "Dune", "publisher": "Ace", "page_count": 500, "language": "en"}
+
+
+def test_update_bumps_updated_at(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+
+    updated = db_client.patch(
+        f"/books/{book['uid']}", json=update_data, headers=auth_headers
+    ).json()
+
+    assert updated["updated_at"] > book["updated_at"]
+
+
+def test_book_etag_revalidates_until_the_book_changes(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    response = db_client.get(f"/books/{book['uid']}", headers=auth_headers)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    cached = db_client.get(
+        f"/books/{book['uid']}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    db_client.post(
+        f"/reviews/review/{book['uid']}",
+        json={"rating": 4, "review_text": "Great"},
+        headers=auth_headers,
+    )
+    changed = db_client.get(
+        f"/books/{book['uid']}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["review_count"] == 1
+
+
+def test_book_if_modified_since(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    response = db_client.get(f"/books/{book['uid']}", headers=auth_headers)
+    last_modified = response.headers["last-modified"]
+
+    cached = db_client.get(
+        f"/books/{book['uid']}",
+        headers={**auth_headers, "If-Modified-Since": last_modified},
+    )
+    assert cached.status_code == 304
+
+    earlier = format_datetime(
+        datetime.now(timezone.utc) - timedelta(days=1), usegmt=True
+    )
+    stale = db_client.get(
+        f"/books/{book['uid']}", headers={**auth_headers, "If-Modified-Since": earlier}
+    )
+    assert stale.status_code == 200
+
+    # If-None-Match wins when both are sent
+    mismatched = db_client.get(
+        f"/books/{book['uid']}",
+        headers={
+            **auth_headers,
+            "If-None-Match": '"stale"',
+            "If-Modified-Since": last_modified,
+        },
+    )
+    assert mismatched.status_code == 200
+
+
+def test_page_etag_follows_writes_and_deletes(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    db_client.post("/books/", json=book_data, headers=auth_headers)
+
+    etag = db_client.get("/books/", headers=auth_headers).headers["etag"]
+    conditional = {**auth_headers, "If-None-Match": etag}
+    assert db_client.get("/books/", headers=conditional).status_code == 304
+
+    db_client.patch(f"/books/{book['uid']}", json=update_data, headers=auth_headers)
+    response = db_client.get("/books/", headers=conditional)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    db_client.delete(f"/books/{book['uid']}", headers=auth_headers)
+    response = db_client.get("/books/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+
+
+def test_review_list_etag_follows_deletes(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    review = db_client.post(
+        f"/reviews/review/{book['uid']}",
+        json={"rating": 4, "review_text": "Great"},
+        headers=auth_headers,
+    ).json()
+
+    etag = db_client.get("/reviews/", headers=auth_headers).headers["etag"]
+    conditional = {**auth_headers, "If-None-Match": etag}
+    assert db_client.get("/reviews/", headers=conditional).status_code == 304
+
+    db_client.delete(f"/reviews/{review['uid']}", headers=auth_headers)
+    response = db_client.get("/reviews/", headers=conditional)
+    assert response.status_code == 200
+    assert response.json()["items"] == []
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+import asyncio
+import threading
+import time
+
+from app import lifecycle as lifecycle_module
+from app.config import Config
+from app.db.db_main import read_router
+from app.db.replica import read_only_sessionmaker
+from app.lifecycle import lifecycle, open_connections, prime_queries
+from app.main import app
+from app.tests.conftest import TEST_DATABASE_URL
+
+
+def wait_until_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.01)
+    raise AssertionError("the worker never became ready")
+
+
+def test_readiness_waits_for_the_warm_up(monkeypatch):
+    warmed_up = threading.Event()
+
+    async def warm_up():
+        while not warmed_up.is_set():
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(lifecycle_module, "warm_up", warm_up)
+
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "warming_up"}
+
+        warmed_up.set()
+        assert wait_until_ready(client).json() == {"status": "ready"}
+        assert "bookly_app_ready 1" in client.get("/metrics").text
+
+    assert lifecycle.stats()["draining"] is True
+    assert lifecycle.ready is False
+
+
+def test_warm_up_retries_until_postgres_answers(monkeypatch):
+    attempts = []
+
+    async def warm_up():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(lifecycle_module, "warm_up", warm_up)
+    monkeypatch.setattr(Config, "WARMUP_RETRY_AFTER", 0.01)
+    monkeypatch.setattr(lifecycle, "warmup_attempts", 0)
+
+    with TestClient(app) as client:
+        wait_until_ready(client)
+
+    assert len(attempts) == 2
+    assert lifecycle.stats()["warmup_attempts"] == 2
+
+
+def test_warm_up_fills_the_pool(db_engine, monkeypatch):
+    # db_engine provides the schema the primed queries read
+    engine = create_async_engine(TEST_DATABASE_URL, pool_size=5)
+    monkeypatch.setattr(read_router, "primary", read_only_sessionmaker(engine))
+    monkeypatch.setattr(read_router, "replica", None)
+
+    async def warm_up():
+        await open_connections(engine, 3)
+        await prime_queries()
+        checked_in = engine.pool.checkedin()
+        await engine.dispose()
+        return checked_in
+
+    assert asyncio.run(warm_up()) == 3
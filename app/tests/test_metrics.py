@@ -0,0 +1,54 @@
+from app.metrics import Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(("/books/",), value)
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/books/",le="0.1"} 1',
+        'latency_seconds_bucket{route="/books/",le="1.0"} 3',
+        'latency_seconds_bucket{route="/books/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/books/"} 4.25',
+        'latency_seconds_count{route="/books/"} 4',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("calls_total", "Calls.", ("route",))
+    counter.inc(('say "hi"',), 2)
+
+    assert counter.render()[-1] == 'calls_total{route="say \\"hi\\""} 2'
+
+
+def test_unmatched_paths_share_one_series(test_client):
+    test_client.get("/no/such/path/1")
+    test_client.get("/no/such/path/2")
+
+    body = test_client.get("/metrics").text
+    assert 'method="GET",route="unmatched",status="404",le="+Inf"' in body
+    assert "/no/such/path" not in body
+
+
+def test_requests_record_route_sql_and_pool_metrics(db_client, auth_headers):
+    db_client.get("/books/", headers=auth_headers)
+    db_client.get("/books/", headers=auth_headers)
+
+    lines = db_client.get("/metrics").text.splitlines()
+    sql = [
+        line
+        for line in lines
+        if line.startswith("bookly_http_request_sql_statements_total")
+        and 'route="/books/"' in line
+        and 'method="GET"' in line
+    ]
+    assert len(sql) == 1 and float(sql[0].split()[-1]) >= 2
+    assert any(
+        line.startswith("bookly_http_request_duration_seconds_count")
+        and 'route="/books/"' in line
+        for line in lines
+    )
+    assert any(line.startswith("bookly_db_pool_utilization ") for line in lines)
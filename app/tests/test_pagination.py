@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+from app.db.pagination import _encode, build_page, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 5, 26, 17, 2, 2, 409235)
+    uid = uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, uid)) == (created_at, uid)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        _encode(["2020-01-01T00:00:00", 123]),
+        _encode([20200101, str(uuid.uuid4())]),
+        _encode(["2020-01-01T00:00:00", None]),
+        _encode({"a": 1, "b": 2}),
+    ],
+)
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+
+    assert exc.value.status_code == 400
+
+
+def test_build_page_only_sets_cursor_when_more_rows_exist():
+    class Row:
+        def __init__(self, created_at):
+            self.created_at = created_at
+            self.uid = uuid.uuid4()
+
+    rows = [Row(datetime(2025, 1, day)) for day in range(3, 0, -1)]
+
+    page = build_page(rows, limit=2)
+    assert page["items"] == rows[:2]
+    assert decode_cursor(page["next_cursor"]) == (rows[1].created_at, rows[1].uid)
+
+    assert build_page(rows, limit=3)["next_cursor"] is None
@@ -0,0 +1,80 @@
+from fastapi.routing import APIRoute
+import logging
+import pytest
+
+from app.auth.auth_routers import auth_router
+from app.books.routes import book_router
+from app.config import Config
+from app.db.query_budget import QueryBudget, QueryBudgetExceeded, QueryLog
+from app.main import app
+from app.reviews.review_routes import review_router
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+def route_budget(path, method):
+    for route in app.routes:
+        if (
+            isinstance(route, APIRoute)
+            and route.path == path
+            and method in route.methods
+        ):
+            for dependency in route.dependant.dependencies:
+                if isinstance(dependency.call, QueryBudget):
+                    return dependency.call
+
+
+@pytest.mark.parametrize("router", [auth_router, book_router, review_router])
+def test_every_route_declares_a_query_budget(router):
+    for route in router.routes:
+        budgets = [
+            dependency.call
+            for dependency in route.dependant.dependencies
+            if isinstance(dependency.call, QueryBudget)
+        ]
+        assert len(budgets) == 1, f"{route.methods} {route.path}"
+
+
+def test_repeated_statement_shapes_are_violations():
+    log = QueryLog()
+    log.statements = [
+        "SELECT reviews.uid FROM reviews WHERE reviews.book_uid = $1::UUID",
+        "SELECT reviews.uid FROM reviews WHERE reviews.book_uid = $1::UUID",
+        "SELECT reviews.uid FROM reviews WHERE reviews.book_uid = $1::UUID",
+        "SELECT books.uid FROM books WHERE books.uid IN ($1::UUID)",
+        "SELECT books.uid FROM books WHERE books.uid IN ($1::UUID, $2::UUID)",
+    ]
+
+    assert QueryBudget(10).violations(log) == [
+        "3 x SELECT reviews.uid FROM reviews WHERE reviews.book_uid = ?"
+    ]
+    assert QueryBudget(4, max_repeats=3).violations(log) == ["5 statements, budget 4"]
+
+
+def test_requests_over_budget_fail(db_client, auth_headers, monkeypatch):
+    db_client.post("/books/", json=book_data, headers=auth_headers)
+    monkeypatch.setattr(route_budget("/books/", "GET"), "max_statements", 1)
+
+    with pytest.raises(QueryBudgetExceeded, match="GET /books/ is over its query"):
+        db_client.get("/books/", headers=auth_headers)
+
+
+def test_debug_mode_logs_the_offending_sql(
+    db_client, auth_headers, monkeypatch, caplog
+):
+    db_client.post("/books/", json=book_data, headers=auth_headers)
+    monkeypatch.setattr(Config, "QUERY_BUDGET_MODE", "warn")
+    monkeypatch.setattr(route_budget("/books/", "GET"), "max_statements", 1)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.query_budget"):
+        response = db_client.get("/books/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert "2 statements, budget 1" in caplog.text
+    assert "FROM books" in caplog.text
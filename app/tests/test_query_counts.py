@@ -0,0 +1,163 @@
+import pytest
+
+# Number of SQL statements each endpoint may issue. RoleChecker authorizes from
+# the token claims, so no route loads the user to check its role.
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+@pytest.fixture
+def book(db_client, auth_headers):
+    response = db_client.post("/books/", json=book_data, headers=auth_headers)
+    book = response.json()
+    for rating in (3, 4):
+        db_client.post(
+            f"/reviews/review/{book['uid']}",
+            json={"rating": rating, "review_text": "Great"},
+            headers=auth_headers,
+        )
+    return book
+
+
+def test_list_books_loads_reviews_in_one_query(
+    db_client, auth_headers, book, statement_log
+):
+    statement_log.clear()
+    response = db_client.get("/books/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["items"][0]["reviews"]) == 2
+    assert statement_log.count == 2
+
+
+def test_user_books_load_no_relationships(db_client, auth_headers, book, statement_log):
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+
+    statement_log.clear()
+    response = db_client.get(f"/books/user/{me['uid']}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert statement_log.count == 1
+
+
+def test_get_book(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.get(f"/books/{book['uid']}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert statement_log.count == 1
+
+
+def test_create_book(db_client, auth_headers, statement_log):
+    statement_log.clear()
+    response = db_client.post("/books/", json=book_data, headers=auth_headers)
+
+    assert response.status_code == 201
+    # The book and its owner's book count
+    assert statement_log.count == 2
+
+
+def test_update_book(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.patch(
+        f"/books/{book['uid']}",
+        json={
+            "title": "Dune Messiah",
+            "publisher": "Putnam",
+            "page_count": 256,
+            "language": "en",
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert statement_log.count == 2
+
+
+def test_delete_book(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.delete(f"/books/{book['uid']}", headers=auth_headers)
+
+    assert response.status_code == 204
+    # Lock the book, DELETE ... RETURNING its reviews and itself, users' counts
+    assert statement_log.count == 4
+
+
+def test_add_review(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.post(
+        f"/reviews/review/{book['uid']}",
+        json={"rating": 2, "review_text": "Meh"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    # INSERT ... RETURNING, the rating aggregates and the author's review count,
+    # the foreign keys validate
+    assert statement_log.count == 3
+
+
+def test_list_reviews(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.get("/reviews/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+    assert statement_log.count == 1
+
+
+def test_book_reviews_skip_the_book(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.get(f"/books/{book['uid']}/reviews", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+    assert statement_log.count == 1
+
+
+def test_me_reads_counts_not_collections(db_client, auth_headers, book, statement_log):
+    statement_log.clear()
+    response = db_client.get("/auth/me/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert (response.json()["book_count"], response.json()["review_count"]) == (1, 2)
+    assert "books" not in response.json()
+    assert statement_log.count == 1
+
+
+def test_sign_up_checks_duplicates_in_the_insert(
+    db_client, auth_headers, statement_log
+):
+    user_data = {
+        "password": "password1",
+        "first_name": "Book",
+        "last_name": "Reader",
+    }
+
+    statement_log.clear()
+    taken_email = db_client.post(
+        "/auth/sign_up/",
+        json={**user_data, "email": "reader@bookly.test", "username": "other"},
+    )
+    taken_username = db_client.post(
+        "/auth/sign_up/",
+        json={**user_data, "email": "other@bookly.test", "username": "reader"},
+    )
+
+    assert taken_email.status_code == taken_username.status_code == 403
+    assert statement_log.count == 2
+
+    statement_log.clear()
+    response = db_client.post(
+        "/auth/sign_up/",
+        json={**user_data, "email": "other@bookly.test", "username": "other"},
+    )
+
+    assert response.status_code == 201
+    assert response.json()["username"] == "other"
+    assert statement_log.count == 1
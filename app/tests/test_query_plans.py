@@ -0,0 +1,137 @@
+from sqlalchemy import text
+import asyncio
+
+from app.auth.user_cache import user_cache
+
+# Every statement the endpoints issue is EXPLAINed with seq scans disabled, so the
+# planner only picks one when no index can serve the query at all.
+EXPLAINED_PREFIXES = ("SELECT", "UPDATE", "DELETE")
+SEED_BOOKS = 5000
+SEED_REVIEWS = 10000
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+async def seed(engine, user_uid):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("""
+                INSERT INTO books (uid, title, publisher, published_date, page_count,
+                                   language, user_uid, review_count, rating_sum,
+                                   created_at, updated_at)
+                SELECT gen_random_uuid(), 'Book ' || i, 'Publisher ' || (i % 50),
+                       now(), 100 + i % 300, 'en', CAST(:user_uid AS uuid), 0, 0,
+                       now() - i * interval '1 minute', now()
+                FROM generate_series(1, :books) AS i
+                """),
+            {"user_uid": user_uid, "books": SEED_BOOKS},
+        )
+        await conn.execute(
+            text("""
+                INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid,
+                                     created_at, updated_at)
+                SELECT gen_random_uuid(), i % 5, 'Seeded', CAST(:user_uid AS uuid),
+                       (SELECT uid FROM books ORDER BY uid OFFSET i % :books LIMIT 1),
+                       now() - i * interval '1 minute', now()
+                FROM generate_series(1, :reviews) AS i
+                """),
+            {"user_uid": user_uid, "books": SEED_BOOKS, "reviews": SEED_REVIEWS},
+        )
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("ANALYZE")
+
+
+def find_seq_scans(plan):
+    scans = []
+    if plan["Node Type"] == "Seq Scan":
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans += find_seq_scans(child)
+    return scans
+
+
+async def explain(engine, statements, parameters):
+    seq_scans = {}
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, params in zip(statements, parameters):
+            if not statement.lstrip().upper().startswith(EXPLAINED_PREFIXES):
+                continue
+            if isinstance(params, list):  # executemany, one parameter set is enough
+                params = params[0]
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", params
+            )
+            plan = result.scalar()[0]["Plan"]
+            if scans := find_seq_scans(plan):
+                seq_scans[statement] = scans
+    return seq_scans
+
+
+def test_service_queries_use_indexes(db_client, auth_headers, db_engine, statement_log):
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    asyncio.run(seed(db_engine, me["uid"]))
+    user_cache.clear()
+
+    statement_log.clear()
+    db_client.post(
+        "/auth/login/",
+        json={"email": "reader@bookly.test", "password": "password1"},
+    )
+    db_client.post(
+        "/auth/sign_up/",
+        json={
+            "email": "reader@bookly.test",
+            "password": "password1",
+            "username": "reader",
+            "first_name": "Book",
+            "last_name": "Reader",
+        },
+    )
+    db_client.get("/auth/me/", headers=auth_headers)
+    first_page = db_client.get("/books/", headers=auth_headers).json()
+    db_client.get(
+        "/books/", params={"cursor": first_page["next_cursor"]}, headers=auth_headers
+    )
+    db_client.get(f"/books/user/{me['uid']}", headers=auth_headers)
+    db_client.get(
+        "/books/search", params={"q": "book", "facets": True}, headers=auth_headers
+    )
+    db_client.get("/books/top-rated", headers=auth_headers)
+    db_client.get(f"/books/{book['uid']}", headers=auth_headers)
+    db_client.patch(
+        f"/books/{book['uid']}",
+        json={**book_data, "title": "Dune Messiah"},
+        headers=auth_headers,
+    )
+    review = db_client.post(
+        f"/reviews/review/{book['uid']}",
+        json={"rating": 4, "review_text": "Great"},
+        headers=auth_headers,
+    ).json()
+    db_client.get("/reviews/", headers=auth_headers)
+    for filters in (
+        {"book_uid": book["uid"], "min_rating": 3},
+        {"user_uid": me["uid"], "created_after": "2026-01-01T00:00:00"},
+        {"min_rating": 4, "max_rating": 4},
+        {"created_after": "2026-01-01T00:00:00", "created_before": "2026-02-01"},
+    ):
+        db_client.get("/reviews/", params=filters, headers=auth_headers)
+    db_client.get(f"/books/{book['uid']}/reviews", headers=auth_headers)
+    db_client.delete(f"/reviews/{review['uid']}", headers=auth_headers)
+    db_client.delete(f"/books/{book['uid']}", headers=auth_headers)
+
+    seq_scans = asyncio.run(
+        explain(db_engine, statement_log.statements, statement_log.parameters)
+    )
+
+    assert statement_log.count > 0
+    assert seq_scans == {}
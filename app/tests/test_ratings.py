@@ -0,0 +1,81 @@
+book_data = {
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+def add_book(db_client, auth_headers, title, ratings):
+    book = db_client.post(
+        "/books/", json={**book_data, "title": title}, headers=auth_headers
+    ).json()
+    reviews = [
+        db_client.post(
+            f"/reviews/review/{book['uid']}",
+            json={"rating": rating, "review_text": "..."},
+            headers=auth_headers,
+        ).json()
+        for rating in ratings
+    ]
+    return book, reviews
+
+
+def test_review_writes_maintain_book_aggregates(db_client, auth_headers):
+    book, reviews = add_book(db_client, auth_headers, "Dune", [4, 3, 2])
+
+    response = db_client.get(f"/books/{book['uid']}", headers=auth_headers).json()
+    assert (response["review_count"], response["rating_sum"]) == (3, 9)
+
+    db_client.delete(f"/reviews/{reviews[0]['uid']}", headers=auth_headers)
+
+    listed = db_client.get("/books/", headers=auth_headers).json()["items"][0]
+    assert listed["review_count"] == 2
+    assert listed["average_rating"] == 2.5
+
+
+def test_top_rated_orders_by_average_rating(db_client, auth_headers):
+    add_book(db_client, auth_headers, "Unreviewed", [])
+    add_book(db_client, auth_headers, "Average", [2, 3])
+    add_book(db_client, auth_headers, "Best", [4, 4])
+    add_book(db_client, auth_headers, "Single", [4])
+
+    top = db_client.get("/books/top-rated", headers=auth_headers).json()
+    assert [book["title"] for book in top] == ["Best", "Single", "Average"]
+
+    top = db_client.get("/books/top-rated?min_reviews=2", headers=auth_headers).json()
+    assert [book["title"] for book in top] == ["Best", "Average"]
+
+
+def test_writes_maintain_user_counts(db_client, auth_headers):
+    book, reviews = add_book(db_client, auth_headers, "Dune", [4, 3])
+    other, _ = add_book(db_client, auth_headers, "Emma", [])
+    db_client.post(
+        "/reviews/bulk",
+        json={"reviews": [{"book_uid": other["uid"], "rating": 1, "review_text": "."}]},
+        headers=auth_headers,
+    )
+    db_client.post(
+        f"/reviews/review/{other['uid']}",
+        json={"rating": 2, "review_text": "."},
+        headers=auth_headers,
+    )
+    db_client.delete(f"/reviews/{reviews[0]['uid']}", headers=auth_headers)
+    # Takes its remaining review along
+    db_client.delete(f"/books/{book['uid']}", headers=auth_headers)
+
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+    assert (me["book_count"], me["review_count"]) == (1, 2)
+
+    books = db_client.get("/auth/me/books", headers=auth_headers).json()
+    assert [item["uid"] for item in books["items"]] == [other["uid"]]
+    first = db_client.get(
+        "/auth/me/reviews", params={"limit": 1}, headers=auth_headers
+    ).json()
+    second = db_client.get(
+        "/auth/me/reviews",
+        params={"limit": 1, "cursor": first["next_cursor"]},
+        headers=auth_headers,
+    ).json()
+    assert [item["rating"] for item in first["items"] + second["items"]] == [2, 1]
+    assert second["next_cursor"] is None
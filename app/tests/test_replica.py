@@ -0,0 +1,162 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+import asyncio
+import os
+import time
+
+import pytest
+import redis.asyncio as redis
+
+from app.db.db_main import read_router
+from app.db.replica import ReadRouter, read_only_sessionmaker
+from app.metrics import instrument_engine
+from app.db.query_budget import track_queries
+from app.tests.conftest import _reset_schema
+
+# A second, empty database stands in for the replica. Nothing replicates into
+# it, so a read served by the replica doesn't see what the tests wrote.
+TEST_REPLICA_DATABASE_URL = os.getenv("TEST_REPLICA_DATABASE_URL")
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.expiry = {}
+
+    async def set(self, key, value, px=None):
+        self.expiry[key] = time.monotonic() + px / 1000
+
+    async def exists(self, key):
+        return int(self.expiry.get(key, 0) > time.monotonic())
+
+
+class BrokenRedis(FakeRedis):
+    async def exists(self, key):
+        raise redis.ConnectionError("connection refused")
+
+
+@pytest.fixture
+def replica_engine():
+    if TEST_REPLICA_DATABASE_URL is None:
+        pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+
+    engine = create_async_engine(TEST_REPLICA_DATABASE_URL, poolclass=NullPool)
+    instrument_engine(engine)
+    track_queries(engine)
+    asyncio.run(_reset_schema(engine))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def fake_redis(db_client, replica_engine, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(read_router, "client", client)
+    monkeypatch.setattr(read_router, "replica", read_only_sessionmaker(replica_engine))
+    monkeypatch.setattr(read_router, "read_your_writes", 5.0)
+    monkeypatch.setattr(read_router, "_replica_down_until", 0.0)
+    return client
+
+
+def test_reads_follow_the_users_writes(db_client, auth_headers, fake_redis):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+
+    # Within the window the writer reads from the primary
+    page = db_client.get("/books/", headers=auth_headers).json()
+    assert [item["uid"] for item in page["items"]] == [book["uid"]]
+
+    fake_redis.expiry.clear()
+    assert db_client.get("/books/", headers=auth_headers).json()["items"] == []
+    # Single book reads fill the cache, they always use the primary
+    response = db_client.get(f"/books/{book['uid']}", headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_unreachable_replica_falls_back_to_the_primary(
+    db_client, auth_headers, fake_redis, monkeypatch
+):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    fake_redis.expiry.clear()
+    broken = create_async_engine(
+        TEST_REPLICA_DATABASE_URL + "_missing", poolclass=NullPool
+    )
+    monkeypatch.setattr(read_router, "replica", read_only_sessionmaker(broken))
+    monkeypatch.setattr(read_router, "fallbacks", 0)
+
+    for _ in range(2):
+        page = db_client.get("/books/", headers=auth_headers).json()
+        assert [item["uid"] for item in page["items"]] == [book["uid"]]
+
+    # The second read skipped the replica instead of failing again
+    assert read_router.fallbacks == 1
+    assert read_router.stats()["replica_available"] is False
+
+
+def test_redis_outage_reads_from_the_primary(db_engine, replica_engine):
+    router = ReadRouter(BrokenRedis(), db_engine, replica_engine)
+
+    async def read_target():
+        session = await router.session("a0b050a4-1068-4cbb-9955-fed4633ef4d4")
+        async with session:
+            result = await session.exec(
+                text(
+                    "SELECT current_database(), current_setting('transaction_read_only')"
+                )
+            )
+            return tuple(result.one())
+
+    database, read_only = asyncio.run(read_target())
+    assert database == db_engine.url.database
+    assert read_only == "on"
+
+
+def test_lagging_replica_counts_as_down(db_engine, replica_engine, monkeypatch):
+    router = ReadRouter(FakeRedis(), db_engine, replica_engine, max_lag=30.0)
+
+    async def read_database(lag):
+        monkeypatch.setattr("app.db.replica.REPLICA_LAG_QUERY", f"SELECT {lag}")
+        session = await router.session()
+        async with session:
+            result = await session.exec(text("SELECT current_database()"))
+            return result.one()[0]
+
+    assert asyncio.run(read_database(1.5)) == replica_engine.url.database
+    checked_at = router._lag_checked_at
+    # Not checked again within retry_after, a lag it would see goes unnoticed
+    assert asyncio.run(read_database(60)) == replica_engine.url.database
+    assert router._lag_checked_at == checked_at
+
+    router._lag_checked_at -= router.retry_after
+    assert asyncio.run(read_database(60)) == db_engine.url.database
+    assert (router.fallbacks, router.replica_lag) == (1, 60.0)
+    assert router.stats()["replica_available"] is False
+
+
+def test_session_factory_routes_like_sessions(db_engine, replica_engine):
+    redis_client = FakeRedis()
+    router = ReadRouter(redis_client, db_engine, replica_engine)
+    user_uid = "a0b050a4-1068-4cbb-9955-fed4633ef4d4"
+
+    async def factories():
+        before = await router.session_factory(user_uid)
+        await router.record_write(user_uid)
+        after = await router.session_factory(user_uid)
+        return before, after
+
+    before, after = asyncio.run(factories())
+    assert (before, after) == (router.replica, router.primary)
+
+    broken = create_async_engine(
+        TEST_REPLICA_DATABASE_URL + "_missing", poolclass=NullPool
+    )
+    router = ReadRouter(FakeRedis(), db_engine, broken)
+    assert asyncio.run(router.session_factory(user_uid)) is router.primary
+    assert router.fallbacks == 1
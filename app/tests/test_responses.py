@@ -0,0 +1,81 @@
+from datetime import datetime
+from sqlalchemy.orm import selectinload
+from sqlmodel import desc, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import asyncio
+import asyncpg.pgproto.pgproto
+import json
+import uuid
+
+from app import responses
+from app.books.schemas import BookPage
+from app.db.models import Book
+from app.reviews.review_schemas import ReviewPage
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+def test_dumps_with_and_without_orjson(monkeypatch):
+    uid = "a0b050a4-1068-4cbb-9955-fed4633ef4d4"
+    content = {
+        "uid": asyncpg.pgproto.pgproto.UUID(uid),
+        "user_uid": uuid.UUID(uid),
+        "created_at": datetime(2026, 10, 18, 12, 30, 5, 250),
+        "average_rating": 3.5,
+    }
+    expected = {
+        "uid": uid,
+        "user_uid": uid,
+        "created_at": "2026-10-18T12:30:05.000250",
+        "average_rating": 3.5,
+    }
+
+    assert json.loads(responses.dumps(content)) == expected
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(content)) == expected
+
+
+async def orm_book_page(engine):
+    # What GET /books/ returned through response_model validation of ORM objects
+    async with AsyncSession(engine) as session:
+        result = await session.exec(
+            select(Book)
+            .options(selectinload(Book.reviews))
+            .order_by(desc(Book.created_at), desc(Book.uid))
+        )
+        page = {"items": result.all(), "next_cursor": None}
+        return BookPage.model_validate(page, from_attributes=True).model_dump(
+            mode="json"
+        )
+
+
+def test_list_rows_match_the_response_models(db_client, auth_headers, db_engine):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    db_client.post("/books/", json=book_data, headers=auth_headers)
+    for rating in (3, 4):
+        db_client.post(
+            f"/reviews/review/{book['uid']}",
+            json={"rating": rating, "review_text": "Great"},
+            headers=auth_headers,
+        )
+    me = db_client.get("/auth/me/", headers=auth_headers).json()
+
+    page = db_client.get("/books/", headers=auth_headers).json()
+    assert page == asyncio.run(orm_book_page(db_engine))
+    assert [item["average_rating"] for item in page["items"]] == [None, 3.5]
+    assert [len(item["reviews"]) for item in page["items"]] == [0, 2]
+
+    user_page = db_client.get(f"/books/user/{me['uid']}", headers=auth_headers)
+    assert user_page.json()["items"] == [
+        {k: v for k, v in item.items() if k != "reviews"} for item in page["items"]
+    ]
+
+    reviews = db_client.get("/reviews/", headers=auth_headers).json()
+    assert ReviewPage.model_validate(reviews).model_dump(mode="json") == reviews
+    assert len(reviews["items"]) == 2
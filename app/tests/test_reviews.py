@@ -0,0 +1,148 @@
+import uuid
+
+from app.auth.auth_utils import create_access_token
+
+book_data = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+
+def test_unknown_book_or_user_is_not_found(db_client, auth_headers):
+    review = {"rating": 4, "review_text": "Great"}
+
+    for book_uid in (uuid.uuid4(), "not-a-uuid"):
+        response = db_client.post(
+            f"/reviews/review/{book_uid}", json=review, headers=auth_headers
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Book does not exist"
+
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    token = create_access_token(
+        {"email": "gone@bookly.test", "user_uid": str(uuid.uuid4()), "role": "user"}
+    )
+    response = db_client.post(
+        f"/reviews/review/{book['uid']}",
+        json=review,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User does not exist"
+
+
+def test_bulk_import_keeps_order_and_aggregates(db_client, auth_headers):
+    first = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    second = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    # Rows are inserted in book uid order, send them in another one
+    first, second = sorted([first, second], key=lambda book: book["uid"], reverse=True)
+    reviews = [
+        {"book_uid": book["uid"], "rating": rating, "review_text": f"#{i}"}
+        for i, (book, rating) in enumerate(
+            [(first, 4), (second, 1), (first, 2), (first, 3)]
+        )
+    ]
+
+    response = db_client.post(
+        "/reviews/bulk", json={"reviews": reviews}, headers=auth_headers
+    )
+
+    assert response.status_code == 201
+    assert [review["review_text"] for review in response.json()] == [
+        "#0",
+        "#1",
+        "#2",
+        "#3",
+    ]
+    first = db_client.get(f"/books/{first['uid']}", headers=auth_headers).json()
+    second = db_client.get(f"/books/{second['uid']}", headers=auth_headers).json()
+    assert (first["review_count"], first["rating_sum"]) == (3, 9)
+    assert (second["review_count"], second["rating_sum"]) == (1, 1)
+
+
+def test_bulk_import_is_all_or_nothing(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    unknown = str(uuid.uuid4())
+    reviews = [
+        {"book_uid": book["uid"], "rating": 4, "review_text": "Great"},
+        {"book_uid": unknown, "rating": 2, "review_text": "Meh"},
+    ]
+
+    response = db_client.post(
+        "/reviews/bulk", json={"reviews": reviews}, headers=auth_headers
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Books do not exist: {unknown}"
+    assert db_client.get("/reviews/", headers=auth_headers).json()["items"] == []
+    book = db_client.get(f"/books/{book['uid']}", headers=auth_headers).json()
+    assert book["review_count"] == 0
+
+
+def test_bulk_import_size_is_bounded(db_client, auth_headers):
+    review = {"book_uid": str(uuid.uuid4()), "rating": 4, "review_text": "Great"}
+
+    for reviews in ([], [review] * 1001):
+        response = db_client.post(
+            "/reviews/bulk", json={"reviews": reviews}, headers=auth_headers
+        )
+        assert response.status_code == 422
+
+
+def test_reviews_page_through_filters(db_client, auth_headers):
+    first = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    second = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+    reviews = [
+        {"book_uid": book["uid"], "rating": rating, "review_text": "..."}
+        for book, rating in [(first, 4), (second, 1), (first, 2), (first, 3)]
+    ]
+    created = db_client.post(
+        "/reviews/bulk", json={"reviews": reviews}, headers=auth_headers
+    ).json()
+
+    params = {"book_uid": first["uid"], "min_rating": 3, "limit": 1}
+    page = db_client.get("/reviews/", params=params, headers=auth_headers).json()
+    rest = db_client.get(
+        "/reviews/",
+        params={**params, "cursor": page["next_cursor"]},
+        headers=auth_headers,
+    ).json()
+
+    ratings = [review["rating"] for review in page["items"] + rest["items"]]
+    assert sorted(ratings) == [3, 4]
+    assert rest["next_cursor"] is None
+
+    window = {"created_after": created[0]["created_at"], "max_rating": 1}
+    page = db_client.get("/reviews/", params=window, headers=auth_headers).json()
+    assert [review["uid"] for review in page["items"]] == [created[1]["uid"]]
+
+    response = db_client.get(
+        "/reviews/", params={"min_rating": 5}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+def test_book_reviews(db_client, auth_headers):
+    book = db_client.post("/books/", json=book_data, headers=auth_headers).json()
+
+    response = db_client.get(f"/books/{book['uid']}/reviews", headers=auth_headers)
+    assert response.json() == {"items": [], "next_cursor": None}
+
+    for rating in (1, 2, 3):
+        db_client.post(
+            f"/reviews/review/{book['uid']}",
+            json={"rating": rating, "review_text": "..."},
+            headers=auth_headers,
+        )
+    page = db_client.get(
+        f"/books/{book['uid']}/reviews", params={"limit": 2}, headers=auth_headers
+    ).json()
+    assert [review["rating"] for review in page["items"]] == [3, 2]
+    assert page["next_cursor"] is not None
+
+    for book_uid in (uuid.uuid4(), "not-a-uuid"):
+        response = db_client.get(f"/books/{book_uid}/reviews", headers=auth_headers)
+        assert response.status_code == 404
@@ -0,0 +1,61 @@
+book_data = {"published_date": "1965-08-01", "page_count": 412}
+
+
+def add_books(db_client, auth_headers):
+    for title, publisher, language in [
+        ("Dune", "Chilton", "en"),
+        ("Dune Messiah", "Putnam", "en"),
+        ("Children of Dune", "Putnam", "en"),
+        ("Der Wüstenplanet Dune", "Heyne", "de"),
+        ("Foundation", "Gnome Press", "en"),
+    ]:
+        db_client.post(
+            "/books/",
+            json={
+                **book_data,
+                "title": title,
+                "publisher": publisher,
+                "language": language,
+            },
+            headers=auth_headers,
+        )
+
+
+def test_search_pages_through_ranked_matches(db_client, auth_headers):
+    add_books(db_client, auth_headers)
+
+    titles, cursor = [], None
+    while True:
+        params = {"q": "dune", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = db_client.get("/books/search", params=params, headers=auth_headers)
+        assert page.status_code == 200
+        titles += [book["title"] for book in page.json()["items"]]
+        cursor = page.json()["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(titles) == len(set(titles)) == 4
+    assert "Foundation" not in titles
+
+
+def test_search_facets_and_filters(db_client, auth_headers):
+    add_books(db_client, auth_headers)
+
+    page = db_client.get(
+        "/books/search", params={"q": "dune", "facets": True}, headers=auth_headers
+    ).json()
+    assert page["facets"]["language"] == [
+        {"value": "en", "count": 3},
+        {"value": "de", "count": 1},
+    ]
+    assert page["facets"]["publisher"][0] == {"value": "Putnam", "count": 2}
+
+    page = db_client.get(
+        "/books/search",
+        params={"q": "dune", "publisher": "Putnam"},
+        headers=auth_headers,
+    ).json()
+    assert sorted(book["title"] for book in page["items"]) == [
+        "Children of Dune",
+        "Dune Messiah",
+    ]
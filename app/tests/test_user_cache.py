@@ -0,0 +1,58 @@
+from datetime import datetime
+import uuid
+
+from app.auth.user_cache import UserCache
+from app.cache import TTLCache
+from app.db.models import User
+
+
+def make_user(email="reader@bookly.test"):
+    return User(
+        uid=uuid.uuid4(),
+        username="reader",
+        email=email,
+        first_name="Book",
+        last_name="Reader",
+        role="user",
+        is_verified=False,
+        password_hash="hash",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now)
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    now += 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_user_cache_invalidates_both_keys():
+    cache = UserCache(maxsize=10, ttl=60)
+    user = make_user()
+    record = cache.put(user)
+
+    assert cache.get_by_email(user.email) is record
+    assert cache.get_by_uid(user.uid) is record
+    assert not hasattr(record, "password_hash")
+
+    cache.invalidate(uid=user.uid)
+    assert cache.get_by_email(user.email) is None
+    assert cache.get_by_uid(user.uid) is None
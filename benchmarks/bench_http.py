@@ -0,0 +1,311 @@
+"""End-to-end latency and throughput of the Bookly API.
+
+Drives app.main:app in-process through httpx's ASGI transport, so the numbers
+include routing, validation, auth, the database and Redis but no network or
+server overhead. Each endpoint is run at every concurrency level by a fixed
+number of workers issuing requests back to back.
+
+The database given by --database-url (or BENCH_DATABASE_URL) is DROPPED and
+recreated, point it at a throwaway database. Redis is the configured server,
+or an in-process fakeredis with --fake-redis (pip install fakeredis).
+
+    python -m benchmarks.bench_http --concurrency 1 8 32 --output results.json
+    python -m benchmarks.bench_http --compare results.json
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.books.book_cache import book_cache
+from app.config import Config
+from app.db import redis as app_redis
+from app.db.db_main import build_engine, get_session, read_router
+from app.db.replica import read_only_sessionmaker
+from app.main import app
+from benchmarks.bench_password_hashing import percentile
+
+CREDENTIALS = {"email": "bench@bookly.test", "password": "password1"}
+BOOK = {
+    "title": "Dune",
+    "publisher": "Chilton",
+    "published_date": "1965-08-01",
+    "page_count": 412,
+    "language": "en",
+}
+
+# Read-only endpoints first, list-reviews before add-review grows the table
+SCENARIOS = dict(
+    login=lambda s: ("POST", "/auth/login/", {"json": CREDENTIALS}),
+    list_books=lambda s: ("GET", "/books/", {}),
+    get_book=lambda s: ("GET", f"/books/{s.pick()}", {}),
+    list_reviews=lambda s: ("GET", "/reviews/", {}),
+    create_book=lambda s: ("POST", "/books/", {"json": BOOK}),
+    update_book=lambda s: ("PATCH", f"/books/{s.pick()}", {"json": BOOK}),
+    add_review=lambda s: (
+        "POST",
+        f"/reviews/review/{s.pick()}",
+        {"json": {"rating": s.random.randint(0, 4), "review_text": "Benchmarked"}},
+    ),
+    delete_book=lambda s: ("DELETE", f"/books/{s.victims.pop()}", {}),
+)
+
+
+class State:
+    def __init__(self, book_uids: list, victims: list, seed: int) -> None:
+        self.book_uids = book_uids
+        self.victims = victims
+        self.random = random.Random(seed)
+
+    def pick(self) -> str:
+        return self.random.choice(self.book_uids)
+
+
+async def seed(engine, user_uid: str, books: int, reviews: int, victims: int):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("""
+                INSERT INTO books (uid, title, publisher, published_date, page_count,
+                                   language, user_uid, review_count, rating_sum,
+                                   created_at, updated_at)
+                SELECT gen_random_uuid(), CASE WHEN i <= :victims THEN 'Victim '
+                       ELSE 'Book ' END || i, 'Publisher ' || (i % 50), now(),
+                       100 + i % 300, 'en', CAST(:user_uid AS uuid), 0, 0,
+                       now() - i * interval '1 minute', now()
+                FROM generate_series(1, :total) AS i
+                """),
+            {"user_uid": user_uid, "victims": victims, "total": books + victims},
+        )
+        await conn.execute(
+            text("""
+                INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid,
+                                     created_at, updated_at)
+                SELECT gen_random_uuid(), i % 5, 'Seeded', CAST(:user_uid AS uuid),
+                       (SELECT uid FROM books WHERE title LIKE 'Book %'
+                        ORDER BY uid OFFSET i % :books LIMIT 1),
+                       now() - i * interval '1 minute', now()
+                FROM generate_series(1, :reviews) AS i
+                """),
+            {"user_uid": user_uid, "books": books, "reviews": reviews},
+        )
+        await conn.execute(text("""
+                UPDATE books SET review_count = stats.review_count,
+                                 rating_sum = stats.rating_sum
+                FROM (SELECT book_uid, count(*) AS review_count,
+                             sum(rating) AS rating_sum
+                      FROM reviews GROUP BY book_uid) AS stats
+                WHERE books.uid = stats.book_uid
+                """))
+        rows = await conn.execute(text("SELECT uid, title FROM books"))
+
+    book_uids, victim_uids = [], []
+    for uid, title in rows:
+        (victim_uids if title.startswith("Victim") else book_uids).append(str(uid))
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("ANALYZE")
+
+    return book_uids, victim_uids
+
+
+async def prepare(client, engine, args) -> State:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    response = await client.post(
+        "/auth/sign_up/",
+        json={
+            **CREDENTIALS,
+            "username": "bench",
+            "first_name": "Bench",
+            "last_name": "Mark",
+        },
+    )
+    response.raise_for_status()
+
+    victims = (args.warmup + args.requests) * len(args.concurrency)
+    book_uids, victim_uids = await seed(
+        engine, response.json()["uid"], args.books, args.reviews, victims
+    )
+
+    response = await client.post("/auth/login/", json=CREDENTIALS)
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    return State(book_uids, victim_uids, args.seed)
+
+
+async def measure(client, state, scenario, concurrency: int, requests: int) -> dict:
+    build = SCENARIOS[scenario]
+    latencies: list = []
+    errors = collections.Counter()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = build(state)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": dict(errors),
+        "requests_per_second": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Scenarios that got slower or lost throughput by more than threshold."""
+    regressions = []
+    for scenario, levels in results["results"].items():
+        for concurrency, current in levels.items():
+            previous = baseline["results"].get(scenario, {}).get(concurrency)
+            if previous is None:
+                continue
+            rps = current["requests_per_second"] / previous["requests_per_second"]
+            p95 = current["p95_ms"] / previous["p95_ms"]
+            if rps < 1 - threshold or p95 > 1 + threshold:
+                regressions.append(
+                    f"{scenario} @ {concurrency}: {rps - 1:+.0%} req/s, "
+                    f"{p95 - 1:+.0%} p95"
+                )
+    return regressions
+
+
+def use_fake_redis() -> None:
+    try:
+        from fakeredis import FakeServer
+        from fakeredis.aioredis import FakeRedis
+    except ImportError:
+        sys.exit("--fake-redis needs fakeredis, pip install fakeredis")
+
+    server = FakeServer()
+    app_redis.blocklist.client = FakeRedis(server=server, decode_responses=True)
+    book_cache.client = FakeRedis(server=server)
+    read_router.client = FakeRedis(server=server)
+
+
+async def main(args) -> dict:
+    engine = build_engine(Config, args.database_url)
+    session_maker = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def get_bench_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_bench_session
+    # Reads use the same database, read-only like in production
+    read_router.primary = read_only_sessionmaker(engine)
+    read_router.replica = None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        state = await prepare(client, engine, args)
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = {}
+            for concurrency in args.concurrency:
+                await measure(client, state, scenario, concurrency, args.warmup)
+                result = await measure(
+                    client, state, scenario, concurrency, args.requests
+                )
+                results[scenario][str(concurrency)] = result
+                print(
+                    f"{scenario:>13} x{concurrency:<3} "
+                    f"{result['requests_per_second']:8.1f} req/s  "
+                    f"p50 {result['p50_ms']:7.2f}ms  p95 {result['p95_ms']:7.2f}ms  "
+                    f"p99 {result['p99_ms']:7.2f}ms"
+                    + (f"  errors {result['errors']}" if result["errors"] else "")
+                )
+
+    await engine.dispose()
+    await app_redis.blocklist.stop()
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "requests": args.requests,
+            "books": args.books,
+            "reviews": args.reviews,
+            "db_pool_size": Config.DB_POOL_SIZE,
+            "password_hash_rounds": Config.PASSWORD_HASH_ROUNDS,
+            # Shed requests show up as 503s under "errors"
+            "admission_concurrency": Config.ADMISSION_CONCURRENCY,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="flag regressions against this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative req/s drop or p95 increase counted as a regression",
+    )
+    args = parser.parse_args()
+    if args.database_url is None:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+
+    if args.fake_redis:
+        use_fake_redis()
+
+    results = asyncio.run(main(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,74 @@
+"""Login throughput and event loop latency while bcrypt runs.
+
+Compares hashing inline on the event loop (the old behaviour) with the bounded
+thread pool in app.auth.auth_utils. A probe coroutine stands in for unrelated
+requests: it sleeps 1ms in a loop and records how late it wakes up.
+
+    python -m benchmarks.bench_password_hashing --logins 64
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.auth.auth_utils import password_context, verify_password
+from app.config import Config
+
+
+async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+    return password_context.verify(plain_password, hashed_password)
+
+
+async def probe(stop: asyncio.Event, delays: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        delays.append(time.perf_counter() - start - 0.001)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(verify, logins: int, hashed_password: str) -> dict:
+    stop = asyncio.Event()
+    delays: list = []
+    probe_task = asyncio.create_task(probe(stop, delays))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("password1", hashed_password) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return {
+        "logins_per_second": logins / elapsed,
+        "probe_p50_ms": statistics.median(delays) * 1000,
+        "probe_p99_ms": percentile(delays, 99) * 1000,
+        "probe_max_ms": max(delays) * 1000,
+    }
+
+
+async def main(logins: int) -> None:
+    hashed_password = password_context.hash("password1")
+    print(
+        f"bcrypt rounds={Config.PASSWORD_HASH_ROUNDS} "
+        f"workers={Config.PASSWORD_HASH_WORKERS} concurrent logins={logins}"
+    )
+    for name, verify in (("inline", inline_verify), ("thread pool", verify_password)):
+        result = await run(verify, logins, hashed_password)
+        print(
+            f"{name:>12}: {result['logins_per_second']:7.1f} logins/s  "
+            f"unrelated request delay p50 {result['probe_p50_ms']:7.2f}ms  "
+            f"p99 {result['probe_p99_ms']:7.2f}ms  max {result['probe_max_ms']:7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,171 @@
+"""Cold start time of a Bookly worker.
+
+Starts uvicorn on app.main:app in a fresh process per run and polls the health
+endpoints: "live" is the first answered /health/live, "ready" the first 200 from
+/health/ready, i.e. after the warm-up (app/lifecycle.py). "shutdown" is the time
+from SIGTERM to exit. The import time of app.main is measured separately.
+
+The worker uses the configured database and Redis, --database-url overrides
+DATABASE_URL (the schema must be migrated, nothing is written).
+
+    python -m benchmarks.bench_startup --runs 10 --output startup.json
+    python -m benchmarks.bench_startup --compare startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from app.config import Config
+from benchmarks.bench_password_hashing import percentile
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(client: httpx.Client, path: str, process, start: float, timeout: float):
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            sys.exit(f"the worker exited with {process.returncode} during start-up")
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    sys.exit(f"{path} did not answer within {timeout}s")
+
+
+def measure_start(env: dict, port: int, timeout: float) -> dict:
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+    ]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            live = wait_for(client, "/health/live", process, start, timeout)
+            ready = wait_for(client, "/health/ready", process, start, timeout)
+        stop = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=timeout)
+        shutdown = time.perf_counter() - stop
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    return {"live": live, "ready": ready, "shutdown": shutdown}
+
+
+def summarize(values: list) -> dict:
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "max_ms": max(values) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Phases whose median got slower by more than threshold."""
+    regressions = []
+    for phase, current in results["results"].items():
+        previous = baseline["results"].get(phase)
+        if previous is None:
+            continue
+        change = current["p50_ms"] / previous["p50_ms"] - 1
+        if change > threshold:
+            regressions.append(f"{phase}: {change:+.0%} p50")
+    return regressions
+
+
+def main(args) -> dict:
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+
+    samples = {"import": [], "live": [], "ready": [], "shutdown": []}
+    for run in range(args.runs):
+        samples["import"].append(measure_import(env))
+        for phase, seconds in measure_start(env, args.port, args.timeout).items():
+            samples[phase].append(seconds)
+        print(
+            f"run {run + 1}: import {samples['import'][-1] * 1000:.0f}ms, "
+            f"live {samples['live'][-1] * 1000:.0f}ms, "
+            f"ready {samples['ready'][-1] * 1000:.0f}ms"
+        )
+
+    results = {phase: summarize(values) for phase, values in samples.items()}
+    for phase, summary in results.items():
+        print(
+            f"{phase:<9} p50 {summary['p50_ms']:8.1f}ms  max {summary['max_ms']:8.1f}ms"
+        )
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "runs": args.runs,
+            "warmup_db_connections": Config.WARMUP_DB_CONNECTIONS,
+            "warmup_redis_connections": Config.WARMUP_REDIS_CONNECTIONS,
+            "warmup_prime_queries": Config.WARMUP_PRIME_QUERIES,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="flag regressions against this JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative p50 increase counted as a regression",
+    )
+    args = parser.parse_args()
+
+    results = main(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
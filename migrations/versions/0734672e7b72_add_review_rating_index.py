@@ -0,0 +1,37 @@
+"""add review rating index
+
+Revision ID: 0734672e7b72
+Revises: e63e0c22e4a4
+Create Date: 2026-10-18 14:05:43.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0734672e7b72'
+down_revision: Union[str, None] = 'e63e0c22e4a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_reviews_rating_created_at_uid',
+            'reviews',
+            ['rating', 'created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_rating_created_at_uid', table_name='reviews', postgresql_concurrently=True)
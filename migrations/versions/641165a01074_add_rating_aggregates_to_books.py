@@ -0,0 +1,59 @@
+"""add rating aggregates to books
+
+Revision ID: 641165a01074
+Revises: 7c637d49f61e
+Create Date: 2026-10-18 11:26:03.512877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '641165a01074'
+down_revision: Union[str, None] = '7c637d49f61e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant defaults, Postgres adds these without rewriting the table
+    op.add_column('books', sa.Column('review_count', sa.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', sa.INTEGER(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE books
+        SET review_count = stats.review_count,
+            rating_sum = stats.rating_sum
+        FROM (
+            SELECT book_uid, count(*) AS review_count, sum(rating) AS rating_sum
+            FROM reviews
+            WHERE book_uid IS NOT NULL
+            GROUP BY book_uid
+        ) AS stats
+        WHERE books.uid = stats.book_uid;
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_top_rated',
+            'books',
+            [sa.text('(CAST(rating_sum AS FLOAT) / review_count)'), 'review_count', 'uid'],
+            unique=False,
+            postgresql_where=sa.text('review_count > 0'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_top_rated', table_name='books', postgresql_concurrently=True)
+
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
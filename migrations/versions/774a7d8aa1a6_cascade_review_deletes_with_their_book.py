@@ -0,0 +1,78 @@
+"""cascade review deletes with their book
+
+Revision ID: 774a7d8aa1a6
+Revises: d7b5161b1fd6
+Create Date: 2026-10-18 16:02:11.255889
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '774a7d8aa1a6'
+down_revision: Union[str, None] = 'd7b5161b1fd6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same name, the API maps it to "Book does not exist". Swapping the constraint
+    # NOT VALID only touches the catalog, its ACCESS EXCLUSIVE lock is brief.
+    op.drop_constraint('reviews_book_uid_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key(
+        'reviews_book_uid_fkey',
+        'reviews',
+        'books',
+        ['book_uid'],
+        ['uid'],
+        ondelete='CASCADE',
+        postgresql_not_valid=True,
+    )
+
+    # Outside the migration's transaction, so the lock above is released first.
+    # Validating only takes SHARE UPDATE EXCLUSIVE, reads and writes go on.
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE reviews VALIDATE CONSTRAINT reviews_book_uid_fkey')
+
+        # Reviews detached by earlier ORM deletes of their book, and their
+        # authors' counts, in a transaction of their own that only locks those rows
+        op.execute(
+            """
+            WITH orphans AS (
+                DELETE FROM reviews
+                WHERE book_uid IS NULL
+                RETURNING user_uid
+            )
+            UPDATE "user"
+            SET review_count = "user".review_count - stats.review_count
+            FROM (
+                SELECT user_uid, count(*) AS review_count
+                FROM orphans
+                WHERE user_uid IS NOT NULL
+                GROUP BY user_uid
+            ) AS stats
+            WHERE "user".uid = stats.user_uid;
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Deleted orphan reviews are not restored
+    op.drop_constraint('reviews_book_uid_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key(
+        'reviews_book_uid_fkey',
+        'reviews',
+        'books',
+        ['book_uid'],
+        ['uid'],
+        postgresql_not_valid=True,
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE reviews VALIDATE CONSTRAINT reviews_book_uid_fkey')
@@ -0,0 +1,54 @@
+"""add keyset pagination indexes to books
+
+Revision ID: 7c637d49f61e
+Revises: 6804017c618d
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c637d49f61e'
+down_revision: Union[str, None] = '6804017c618d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so a large books table stays writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_created_at_uid',
+            'books',
+            ['created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_user_uid_created_at_uid',
+            'books',
+            ['user_uid', 'created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_books_user_uid_created_at_uid',
+            table_name='books',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_books_created_at_uid',
+            table_name='books',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,58 @@
+"""add book and review counts to users
+
+Revision ID: d7b5161b1fd6
+Revises: 0734672e7b72
+Create Date: 2026-10-18 15:21:46.934850
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b5161b1fd6'
+down_revision: Union[str, None] = '0734672e7b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant defaults, Postgres adds these without rewriting the table
+    op.add_column('user', sa.Column('book_count', sa.INTEGER(), server_default='0', nullable=False))
+    op.add_column('user', sa.Column('review_count', sa.INTEGER(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE "user"
+        SET book_count = stats.book_count
+        FROM (
+            SELECT user_uid, count(*) AS book_count
+            FROM books
+            WHERE user_uid IS NOT NULL
+            GROUP BY user_uid
+        ) AS stats
+        WHERE "user".uid = stats.user_uid;
+        """
+    )
+    op.execute(
+        """
+        UPDATE "user"
+        SET review_count = stats.review_count
+        FROM (
+            SELECT user_uid, count(*) AS review_count
+            FROM reviews
+            WHERE user_uid IS NOT NULL
+            GROUP BY user_uid
+        ) AS stats
+        WHERE "user".uid = stats.user_uid;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'review_count')
+    op.drop_column('user', 'book_count')
@@ -0,0 +1,80 @@
+"""add user unique constraints and review indexes
+
+Revision ID: e63e0c22e4a4
+Revises: 31e51e7769dc
+Create Date: 2026-10-18 12:31:07.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e63e0c22e4a4'
+down_revision: Union[str, None] = '31e51e7769dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+USER_UNIQUE_COLUMNS = {'uq_user_email': 'email', 'uq_user_username': 'username'}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A failed concurrent build leaves an invalid index behind, refuse up front
+    connection = op.get_bind()
+    for column in USER_UNIQUE_COLUMNS.values():
+        duplicates = connection.execute(
+            sa.text(
+                f'SELECT count(*) FROM (SELECT {column} FROM "user" '
+                f'GROUP BY {column} HAVING count(*) > 1) AS duplicates'
+            )
+        ).scalar()
+        if duplicates:
+            raise RuntimeError(
+                f'{duplicates} duplicated user {column} value(s), '
+                'resolve them before running this migration'
+            )
+
+    # Books are already covered by ix_books_user_uid_created_at_uid (user_uid first)
+    with op.get_context().autocommit_block():
+        for name, column in USER_UNIQUE_COLUMNS.items():
+            op.create_index(name, 'user', [column], unique=True, postgresql_concurrently=True)
+        op.create_index(
+            'ix_reviews_book_uid_created_at_uid',
+            'reviews',
+            ['book_uid', 'created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_reviews_user_uid_created_at_uid',
+            'reviews',
+            ['user_uid', 'created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_reviews_created_at_uid',
+            'reviews',
+            ['created_at', 'uid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+    # Promoting an existing unique index to a constraint is a catalog-only change
+    for name in USER_UNIQUE_COLUMNS:
+        op.execute(f'ALTER TABLE "user" ADD CONSTRAINT {name} UNIQUE USING INDEX {name}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_created_at_uid', table_name='reviews', postgresql_concurrently=True)
+        op.drop_index('ix_reviews_user_uid_created_at_uid', table_name='reviews', postgresql_concurrently=True)
+        op.drop_index('ix_reviews_book_uid_created_at_uid', table_name='reviews', postgresql_concurrently=True)
+
+    for name in reversed(list(USER_UNIQUE_COLUMNS)):
+        op.drop_constraint(name, 'user', type_='unique')